@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+# Time hub.generate() on the T2T Macaque Hub example without touching the filesystem.
+# Usage: python benchmarks/benchmark_generate.py [repeats]
+
+import os
+import sys
+import time
+import timeit
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+import bigtrack
+
+
+def build_hub():
+
+    # run the example script without its final hub.generate() call
+    path = os.path.join(root, "trackhubs", "generate_T2TMacaqueHub.py")
+    with open(path, "r") as f:
+        source = f.read().replace("\nhub.generate()", "\n")
+    namespace = {"__name__": "__benchmark__"}
+    exec(compile(source, path, "exec"), namespace)
+    return namespace["hub"]
+
+
+def main():
+
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    start = time.perf_counter()
+    hub = build_hub()
+    print(f"build:    {(time.perf_counter() - start) * 1000:.2f} ms")
+
+    sink = bigtrack.MemorySink()
+    hub.generate(sink=sink)
+    n_bytes = sum(len(v) for v in sink.files.values())
+
+    print(f"output:   {len(sink.files)} files, {n_bytes} characters")
+
+    # the formatter on its own, then repeated runs served from the stanza cache
+    for cache_stanzas in (False, True):
+        bigtrack.HubComponent.cache_stanzas = cache_stanzas
+        seconds = min(timeit.repeat(lambda: hub.generate(sink=bigtrack.NullSink()), number=1, repeat=repeats))
+        label = "cached:  " if cache_stanzas else "generate:"
+        print(f"{label} {seconds * 1000:.2f} ms (best of {repeats})")
+    bigtrack.HubComponent.cache_stanzas = False
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 
+from .template import Template
 from .hub_component import HubComponent
 from .hub import Hub
 from .genome import Genome
 from .group import Group
 from .trackdb import TrackDb
 from .track import Track
+from .track_columns import TrackColumns
+from .child_provider import ChildProvider
 from .composite_track import CompositeTrack
 from .sampled_track import SampledCompositeTrack
 from .super_track import SuperTrack
 from .multiwig import MultiWig
+from .sink import Sink, DirectorySink, MemorySink, NullSink
+from .manifest import ManifestSink
+from .archive import ArchiveSink
+from .target import Target
+from .core import Core
 
 
 __version__ = "0.2"
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import tarfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from .sink import Sink
+
+
+class ArchiveSink(Sink):
+
+    tar_modes = {
+        ".tar": "",
+        ".tar.gz": "gz",
+        ".tgz": "gz",
+        ".tar.bz2": "bz2",
+        ".tar.xz": "xz",
+    }
+
+    def __init__(self, archive, root="", archive_format=None):
+
+        self.root = root or "."
+        self.archive_format = archive_format or self._guess_format(archive)
+        if not self.archive_format.startswith("."):
+            self.archive_format = "." + self.archive_format
+        self.mtime = time.time()
+        self._lock = threading.Lock()
+
+        if self.archive_format == ".zip":
+            self._zip = zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED)
+            self._tar = None
+        elif self.archive_format in self.tar_modes:
+            compression = self.tar_modes[self.archive_format]
+            # file objects are written as a stream, so they need not be seekable
+            if isinstance(archive, (str, os.PathLike)):
+                self._tar = tarfile.open(archive, f"w:{compression}")
+            else:
+                self._tar = tarfile.open(fileobj=archive, mode=f"w|{compression}")
+            self._zip = None
+        else:
+            raise ValueError(f"Unsupported archive format: {self.archive_format}.")
+
+    def _guess_format(self, archive):
+
+        if not isinstance(archive, (str, os.PathLike)):
+            raise ValueError("archive_format is required when archive is a file object.")
+
+        name = os.fspath(archive).lower()
+        for suffix in sorted(list(self.tar_modes) + [".zip"], key=len, reverse=True):
+            if name.endswith(suffix):
+                return suffix
+        raise ValueError(f"Cannot guess archive format of {archive}.")
+
+    @contextmanager
+    def open(self, path, buffering=-1):
+
+        # each member is rendered in memory, then added to the archive in one piece
+        buffer = io.BytesIO()
+        with io.TextIOWrapper(buffer, encoding="utf-8", write_through=False) as f:
+            yield f
+            f.flush()
+            data = buffer.getvalue()
+
+        name = os.path.relpath(path, self.root).replace(os.sep, "/")
+        with self._lock:
+            if self._zip is not None:
+                info = zipfile.ZipInfo(name, date_time=time.localtime(self.mtime)[:6])
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                self._zip.writestr(info, data)
+            else:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = self.mtime
+                info.mode = 0o644
+                self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
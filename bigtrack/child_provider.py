@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+from .track_columns import TrackColumns
+
+
+class ChildProvider(object):
+
+    __slots__ = ("parent", "provider", "children", "consumed")
+
+    def __init__(self, provider):
+
+        # a callable returning tracks, or an iterable of tracks that is consumed once
+        self.parent = None
+        self.provider = provider
+        self.children = ()
+        self.consumed = False
+
+    def __iter__(self):
+
+        if callable(self.provider):
+            tracks = self.provider()
+        else:
+            if self.consumed and iter(self.provider) is self.provider:
+                raise ValueError(f"{self.__class__.__name__}: children of {self.parent.kwargs['track']} were already consumed, pass a callable to generate them again.")
+            tracks = self.provider
+        self.consumed = True
+
+        # children are attached while they are written and never kept by the parent
+        genome = self.parent.get_genome() if self.parent is not None else None
+        seen = set()
+        for track in tracks:
+            if isinstance(track, TrackColumns):
+                names = track.columns["track"]
+                track.template["parent"] = self.parent.kwargs["track"]
+            else:
+                names = (track.kwargs["track"],)
+                track.kwargs["parent"] = self.parent.kwargs["track"]
+            for name in names:
+                if name in seen or (genome is not None and name in genome.track_index):
+                    raise ValueError(f"{self.__class__.__name__}: duplicate track name {name}.")
+                seen.add(name)
+            track.parent = self.parent
+            yield track
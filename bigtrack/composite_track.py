@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
 
+import re
 from .track import Track
+from .track_columns import TrackColumns
+from .sample_sheet import read_sample_sheet, sample_sheet_columns, metadata_column, subgroups_column, subgroup_definitions
 
 
 class CompositeTrack(Track):
 
+    __slots__ = ()
+
     default_kwargs = {
         "compositeTrack": "on",
         "parent": None,
@@ -14,3 +19,44 @@ class CompositeTrack(Track):
     def __init__(self, **kwargs):
 
         super().__init__(**kwargs)
+
+    def add_child_columns(self, columns: dict, track_class=Track, template=None, **kwargs):
+
+        # one child per row of columns, template and kwargs are shared by every row
+        if template is not None:
+            kwargs = {**template, **kwargs}
+        child_columns = TrackColumns(columns, track_class, **kwargs)
+        genome = self.get_genome()
+        if genome is not None:
+            genome._index_tracks([child_columns])
+
+        child_columns.parent = self
+        child_columns.template["parent"] = self.kwargs["track"]
+        self.children.append(child_columns)
+        return child_columns
+
+    def add_sample_sheet(self, path, track_class=Track, template=None, metadata=(), subgroups=(), delimiter=None, **settings):
+
+        # one child per row of a TSV/CSV sample sheet, e.g. track="{sample}_{tissue}", bigDataUrl="{url}"
+        header, rows = read_sample_sheet(path, delimiter=delimiter)
+        for name in (*metadata, *subgroups):
+            if name not in header:
+                raise ValueError(f"{self.__class__.__name__}: column {name} not found in {path}.")
+
+        sheet, columns, shared = sample_sheet_columns(header, rows, settings)
+        if metadata:
+            columns["metadata"] = metadata_column(sheet, metadata)
+        if subgroups:
+            columns["subGroups"] = subgroups_column(sheet, subgroups)
+            # subgroups already declared on the composite are kept as they are
+            declared = {k: str(v).split(None, 1)[0] for k, v in self.kwargs.items() if re.fullmatch(r"subGroup\d+", k)}
+            n = 1
+            for name, definition in subgroup_definitions(sheet, subgroups).items():
+                if name in declared.values():
+                    continue
+                while f"subGroup{n}" in declared:
+                    n += 1
+                self.kwargs[f"subGroup{n}"] = definition
+                declared[f"subGroup{n}"] = name
+
+        return self.add_child_columns(columns, track_class=track_class, template=template, **shared)
@@ -1,39 +1,321 @@
 #!/usr/bin/env python3
 
 import os
-import tomllib
+import json
+import hashlib
+from itertools import chain, product
+from .template import Template
 from .hub import Hub
+from .genome import Genome
+from .group import Group
+from .trackdb import TrackDb
+from .track import Track
+from .composite_track import CompositeTrack
+from .sampled_track import SampledCompositeTrack
+from .super_track import SuperTrack
+from .multiwig import MultiWig
+from .snapshot import load_snapshot, save_snapshot
+
+try:
+    import tomllib
+except ImportError:
+    # Python < 3.11
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+
+TRACK_CLASSES = {cls.__name__: cls for cls in (Track, CompositeTrack, SampledCompositeTrack, SuperTrack, MultiWig)}
+
+
+def read_json_lines(path, includes=None):
+
+    # one track per line, read one line at a time and hashed on the way for the config cache
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for line in f:
+            digest.update(line)
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    if includes is not None:
+        includes[path] = digest.hexdigest()
+
+
+def file_digest(path, prefix=b""):
+
+    digest = hashlib.sha256(prefix)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_track_class(name):
+
+    if name not in TRACK_CLASSES:
+        raise ValueError(f"Core: unknown track class {name}.")
+    return TRACK_CLASSES[name]
+
+
+def get_template(name, context):
+
+    if name is None:
+        return None
+    if name not in context.templates:
+        raise ValueError(f"Core: template {name} not found in config.")
+    return context.templates[name]
+
+
+class ConfigContext(object):
+
+    __slots__ = ("templates", "lists", "variables")
+
+    def __init__(self, templates, lists, variables):
+
+        # named templates and lists, and variables for matrix patterns, e.g. {genome}
+        self.templates = templates
+        self.lists = lists
+        self.variables = variables
+
+
+def matrix_axes(matrix, context):
+
+    # axis name -> values, given inline or as the name of a list in the config
+    axes = {}
+    for k, v in matrix.items():
+        if isinstance(v, str):
+            if v not in context.lists:
+                raise ValueError(f"Core: list {v} not found in config.")
+            v = context.lists[v]
+        axes[k] = list(v)
+    return axes
+
+
+def expand_matrix(spec, context):
+
+    # one track spec per combination of axis values, the first axis varies slowest
+    spec = dict(spec)
+    axes = matrix_axes(spec.pop("matrix"), context)
+    spec.pop("lazy", None)
+    names = list(axes)
+    for values in product(*axes.values()):
+        variables = dict(context.variables)
+        variables.update(zip(names, values))
+        try:
+            yield {k: v.format_map(variables) if isinstance(v, str) else v for k, v in spec.items()}
+        except KeyError as e:
+            raise ValueError(f"Core: unknown variable {e} in matrix track {spec.get('track')}.") from None
+
+
+def build_track(spec, context, tracks=None, base_dir="", includes=None):
+
+    # spec is a dict of settings, plus class, template, children, children_file and lazy
+    spec = dict(spec)
+    track_class = get_track_class(spec.pop("class", "Track"))
+    template = get_template(spec.pop("template", None), context)
+    children = spec.pop("children", [])
+    children_file = spec.pop("children_file", None)
+    lazy = spec.pop("lazy", False)
+
+    if track_class is SampledCompositeTrack:
+        name = spec.pop("full_track", None)
+        if tracks is None or name not in tracks:
+            raise ValueError(f"Core: full_track {name} of {spec.get('track')} must be defined before it.")
+        track = SampledCompositeTrack(full_track=tracks[name], **spec)
+    else:
+        track = track_class(template=template, **spec)
+
+    for child in children:
+        if "columns" in child:
+            child = dict(child)
+            track.add_child_columns(
+                child.pop("columns"),
+                track_class=get_track_class(child.pop("class", "Track")),
+                template=get_template(child.pop("template", None), context),
+                **child,
+            )
+        elif "sample_sheet" in child:
+            child = dict(child)
+            path = os.path.join(base_dir, child.pop("sample_sheet"))
+            if includes is not None:
+                includes[path] = file_digest(path)
+            track.add_sample_sheet(
+                path,
+                track_class=get_track_class(child.pop("class", "Track")),
+                template=get_template(child.pop("template", None), context),
+                **child,
+            )
+        elif "matrix" in child:
+            if child.get("lazy", True):
+                # expanded while the trackDb file is written, the first track is built now,
+                # so an unknown template or class, or a missing setting, fails at load time
+                first = next(expand_matrix(child, context), None)
+                if first is not None:
+                    build_track(first, context)
+                track.add_child_provider(MatrixTracks(child, context))
+            else:
+                for expanded in expand_matrix(child, context):
+                    track.add_child(build_track(expanded, context, tracks, base_dir, includes))
+        else:
+            track.add_child(build_track(child, context, tracks, base_dir, includes))
+
+    if children_file is not None:
+        path = os.path.join(base_dir, children_file)
+        if lazy:
+            # children are read while the trackDb file is written, and never kept
+            track.add_child_provider(JsonLinesTracks(path, context))
+        else:
+            for child in read_json_lines(path, includes):
+                track.add_child(build_track(child, context, tracks, os.path.dirname(path), includes))
+
+    if tracks is not None:
+        tracks[track.kwargs["track"]] = track
+    return track
+
+
+class JsonLinesTracks(object):
+
+    __slots__ = ("path", "context")
+
+    def __init__(self, path, context):
+
+        # a picklable provider, so snapshots keep lazy children
+        self.path = path
+        self.context = context
+
+    def __call__(self):
+
+        base_dir = os.path.dirname(self.path)
+        for spec in read_json_lines(self.path):
+            yield build_track(spec, self.context, base_dir=base_dir)
+
+
+class MatrixTracks(object):
+
+    __slots__ = ("spec", "context")
+
+    def __init__(self, spec, context):
+
+        # a matrix track spec, expanded each time it is iterated
+        self.spec = spec
+        self.context = context
+
+    def __call__(self):
+
+        for spec in expand_matrix(self.spec, self.context):
+            yield build_track(spec, self.context)
 
 
 class Core(object):
 
-    def __init__(self, config_path):
+    def __init__(self, config_path, cache_dir=None):
 
         self.hub = None
+        self.config = None
+        self.config_dir = os.path.dirname(os.path.abspath(config_path))
+        self.templates = {}
+        self.lists = {}
+        self.context = None
+        # track name -> Track of the genome being built, for full_track references
+        self.tracks = {}
+        # JSON Lines files read while building -> content hash
+        self.includes = {}
+        self.cache_path = None
+
+        if cache_dir is not None:
+            # keyed by the config path and content, included files are checked on load
+            key = file_digest(config_path, prefix=os.path.abspath(config_path).encode("utf-8") + b"\0")
+            self.cache_path = os.path.join(cache_dir, f"{key}.snapshot")
+            if self.load_cache():
+                return
+
         self.config = self.parse_config_file(config_path)
         self.parse_config()
-    
+        if self.cache_path is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+            save_snapshot((self.includes, self.hub), self.cache_path)
+
+    def load_cache(self):
+
+        # any stale, missing or unreadable cache means a full build, whatever the error,
+        # e.g. entries from a changed class layout can fail with AttributeError or ImportError
+        try:
+            includes, hub = load_snapshot(self.cache_path)
+            for path, digest in includes.items():
+                if file_digest(path) != digest:
+                    return False
+        except Exception:
+            return False
+
+        self.includes = includes
+        self.hub = hub
+        return True
+
     def parse_config_file(self, path):
 
         suffix = os.path.splitext(path)[1].lower()
 
         if suffix == ".toml":
+            if tomllib is None:
+                raise ValueError("Core: TOML configs need Python 3.11 or the tomli package.")
             with open(path, "rb") as f:
                 return tomllib.load(f)
 
         elif suffix == ".json":
             with open(path, "r") as f:
                 return json.load(f)
-        
+
         else:
-            raise ValueError(f"Unsopported config file type: {suffix}.")
-    
+            raise ValueError(f"Unsupported config file type: {suffix}.")
+
     def parse_config(self):
 
-        genomes = list()
-        groups = list()
-        trackDbs = list()
-        tracks = list()
+        if "hub" not in self.config:
+            raise ValueError("Core: hub settings not found in config.")
+
+        self.templates = {name: Template(**settings) for name, settings in self.config.get("templates", {}).items()}
+        self.lists = self.config.get("lists", {})
+        self.hub = Hub(**self.config["hub"])
+        for genome_config in self.config.get("genomes", []):
+            self.hub.add_genome(self.build_genome(genome_config))
+        return self.hub
+
+    def build_genome(self, config):
+
+        config = dict(config)
+        groups = config.pop("groups", [])
+        trackDbs = config.pop("trackDbs", [])
+
+        genome = Genome(**config)
+        self.tracks = {}
+        variables = {**self.config.get("variables", {}), "genome": genome.kwargs["genome"]}
+        self.context = ConfigContext(self.templates, self.lists, variables)
+        for group_config in groups:
+            genome.add_group(Group(**group_config))
+        for trackDb_config in trackDbs:
+            # tracks are attached before the trackDb, so the genome indexes them in one pass
+            genome.add_trackDb(self.build_trackDb(trackDb_config))
+        return genome
+
+    def build_trackDb(self, config):
+
+        config = dict(config)
+        tracks = config.pop("tracks", [])
+        tracks_file = config.pop("tracks_file", None)
+
+        trackDb = TrackDb(**config)
+        if tracks_file is not None:
+            tracks = chain(tracks, read_json_lines(os.path.join(self.config_dir, tracks_file), self.includes))
+        for spec in tracks:
+            # top-level tracks have no provider, so their matrices are expanded now
+            specs = expand_matrix(spec, self.context) if "matrix" in spec else (spec,)
+            for expanded in specs:
+                trackDb.add_track(build_track(expanded, self.context, self.tracks, self.config_dir, self.includes))
+        return trackDb
 
-        
+    def generate(self, **kwargs):
 
+        # same options and result as Hub.generate
+        return self.hub.generate(**kwargs)
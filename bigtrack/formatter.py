@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+
+class Formatter(object):
+
+    __slots__ = ("required_keys", "skip_keys", "_prefixes")
+
+    def __init__(self, required_keys, hidden_keys=()):
+
+        # key order and membership are resolved once per class, not once per stanza
+        self.required_keys = tuple(k for k in required_keys if not k.startswith("_") and k not in hidden_keys)
+        self.skip_keys = frozenset(required_keys) | frozenset(hidden_keys)
+        self._prefixes = {}
+
+    def _required_prefixes(self, indent_level):
+
+        prefixes = self._prefixes.get(indent_level)
+        if prefixes is None:
+            indent = indent_level * 4 * " "
+            prefixes = self._prefixes[indent_level] = (indent, tuple((k, f"{indent}{k} ") for k in self.required_keys))
+        return prefixes
+
+    def iter_lines(self, kwargs, indent_level=0):
+
+        indent, required = self._required_prefixes(indent_level)
+        skip_keys = self.skip_keys
+
+        for k, prefix in required:
+            yield f"{prefix}{kwargs[k]}"
+
+        for k, v in kwargs.items():
+            if k in skip_keys or k[0] == "_": continue
+            yield f"{indent}{k} {v}"
+
+    def render(self, kwargs, indent_level=0):
+
+        # the whole stanza in one pass, ending with a blank line
+        indent, required = self._required_prefixes(indent_level)
+        skip_keys = self.skip_keys
+
+        lines = [f"{prefix}{kwargs[k]}\n" for k, prefix in required]
+        lines.extend([f"{indent}{k} {v}\n" for k, v in kwargs.items() if k not in skip_keys and k[0] != "_"])
+        lines.append("\n")
+        return "".join(lines)
+
+
+_formatters = {}
+
+
+def get_formatter(cls, hidden_keys=()):
+
+    key = (cls, hidden_keys)
+    formatter = _formatters.get(key)
+    if formatter is None:
+        formatter = _formatters[key] = Formatter(cls.required_keys, hidden_keys)
+    return formatter
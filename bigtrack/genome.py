@@ -1,13 +1,21 @@
 #!/usr/bin/env python3
 
 import os
-from .hub_component import HubComponent
+from functools import partial
+from .hub_component import HubComponent, run_tasks
 from .group import Group
 from .trackdb import TrackDb
+from .track import walk_tracks
+from .track_columns import INDEXED_SETTINGS, TrackColumns
+from .query import TrackQuery, is_view, node_setting
+from .child_provider import ChildProvider
+from .sink import DirectorySink
 
 
 class Genome(HubComponent):
 
+    __slots__ = ("hub", "groups", "trackDbs", "track_index", "setting_index", "view_nodes")
+
     default_kwargs = {
         "trackDb": "trackDb.txt",
         "groups": "groups.txt",
@@ -20,6 +28,12 @@ class Genome(HubComponent):
         self.hub = None
         self.groups = []
         self.trackDbs = []
+        # track name -> Track, or (TrackColumns, row) for columnar children
+        self.track_index = {}
+        # setting -> value -> tracks (and columnar blocks), in insertion order, built by the first query
+        self.setting_index = None
+        # views (e.g. sampled children) are checked by every query instead of being indexed
+        self.view_nodes = None
     
     def _auto_complete_kwargs(self):
 
@@ -42,19 +56,158 @@ class Genome(HubComponent):
         if not isinstance(trackDb, TrackDb):
             raise ValueError(f"TrackDb must be an instance of TrackDb, not {type(trackDb)}.")
         
+        self._index_tracks(trackDb.tracks)
+        trackDb.genome = self
         self.trackDbs.append(trackDb)
 
-    def generate(self, target_path=""):
+    def find_track(self, name):
 
-        os.makedirs(os.path.join(target_path, self.kwargs["genome"]), exist_ok=True)
+        entry = self.track_index.get(name)
+        if isinstance(entry, tuple):
+            child_columns, i = entry
+            return child_columns.live_row(i)
+        return entry
+
+    def _index_tracks(self, tracks):
+
+        # check a whole subtree before indexing it, so a duplicate leaves the index untouched
+        entries = {}
+
+        def add(name, entry):
+            if name in self.track_index or name in entries:
+                raise ValueError(f"Genome {self.kwargs['genome']}: duplicate track name {name}.")
+            entries[name] = entry
+
+        # provided children are checked when they are written
+        nodes = []
+        for track, _ in walk_tracks(tracks, expand_providers=False):
+            if isinstance(track, ChildProvider):
+                continue
+            if isinstance(track, TrackColumns):
+                for i, name in enumerate(track.columns["track"]):
+                    add(name, (track, i))
+            else:
+                add(track.kwargs["track"], track)
+            nodes.append(track)
+
+        self.track_index.update(entries)
+        if self.setting_index is not None:
+            self._index_settings(nodes)
+
+    def _index_settings(self, nodes):
+
+        for node in nodes:
+            if is_view(node):
+                self.view_nodes[node] = None
+                continue
+            for k in INDEXED_SETTINGS:
+                self.setting_index[k].setdefault(self._index_value(k, node_setting(node, k)), {})[node] = None
+
+    def _unindex_tracks(self, tracks):
+
+        for track, _ in walk_tracks(tracks, expand_providers=False):
+            if isinstance(track, ChildProvider):
+                continue
+            names = track.columns["track"] if isinstance(track, TrackColumns) else (track.kwargs["track"],)
+            for name in names:
+                self.track_index.pop(name, None)
+            if self.setting_index is None:
+                continue
+            self.view_nodes.pop(track, None)
+            for k in INDEXED_SETTINGS:
+                bucket = self.setting_index[k].get(self._index_value(k, node_setting(track, k)))
+                if bucket is not None:
+                    bucket.pop(track, None)
+
+    def _index_value(self, key, value):
+
+        # types are indexed by their first word, e.g. bigBed for "bigBed 9 +"
+        if key == "type" and value is not None:
+            words = str(value).split(None, 1)
+            return words[0] if words else ""
+        return value
+
+    def _reindex(self, node, key, old, new):
+
+        if key == "track":
+            # node is a Track, or (TrackColumns, row) for a columnar child
+            if self.track_index.get(old) != node:
+                return
+            if new in self.track_index:
+                raise ValueError(f"Genome {self.kwargs['genome']}: duplicate track name {new}.")
+            del self.track_index[old]
+            self.track_index[new] = node
+            return
+
+        if self.setting_index is None:
+            return
+        buckets = self.setting_index[key]
+        bucket = buckets.get(self._index_value(key, old))
+        # nodes outside the index, e.g. provided children, are left alone
+        if bucket is None or node not in bucket:
+            return
+        del bucket[node]
+        buckets.setdefault(self._index_value(key, new), {})[node] = None
+
+    def _nodes(self):
+
+        return [track for trackDb in self.trackDbs
+                for track, _ in walk_tracks(trackDb.tracks, expand_providers=False)
+                if not isinstance(track, ChildProvider)]
+
+    def _build_setting_index(self):
+
+        # built once, then kept current by every insert, removal and setting change
+        if self.setting_index is None:
+            self.setting_index = {k: {} for k in INDEXED_SETTINGS}
+            self.view_nodes = {}
+            self._index_settings(self._nodes())
+        return self.setting_index
+
+    def query(self, predicate=None, **settings):
+
+        # candidates are the children of the parent, or come from the smallest matching setting index,
+        # then every filter is checked
+        candidates = None
+        if "parent" in settings:
+            # a columnar row or an unknown name has no children
+            parent = self.track_index.get(settings["parent"])
+            candidates = [child for child in getattr(parent, "children", ()) if not isinstance(child, ChildProvider)]
+        elif any(k in settings for k in INDEXED_SETTINGS):
+            setting_index = self._build_setting_index()
+            for k in INDEXED_SETTINGS:
+                if k in settings:
+                    nodes = setting_index[k].get(self._index_value(k, settings[k]), {})
+                    if candidates is None or len(nodes) < len(candidates):
+                        candidates = nodes
+            if self.view_nodes:
+                candidates = {**candidates, **self.view_nodes}
+        else:
+            candidates = self._nodes()
+
+        return TrackQuery(candidates).filter(predicate, **settings)
+
+    def generate(self, target_path="", workers=None, sink=None):
+
+        sink = DirectorySink() if sink is None else sink
+        sink.makedirs(os.path.join(target_path, self.kwargs["genome"]))
+        self.generate_groups(target_path, sink=sink)
 
-        # generate groups.txt
-        with open(os.path.join(target_path, self.kwargs["groups"]), "w") as groups_f:
-            for group in self.groups:
-                groups_f.write(group.format())
-        
         # generate trackDb.txt
-        with open(os.path.join(target_path, self.kwargs["trackDb"]), "w") as trackDb_f:
+        with sink.open(os.path.join(target_path, self.kwargs["trackDb"])) as trackDb_f:
             for trackDb in self.trackDbs:
-                trackDb_f.write(trackDb.format())
-                trackDb.generate(os.path.join(target_path, self.kwargs["genome"]))
+                trackDb.write(trackDb_f)
+
+        # include files are independent of each other, see run_tasks for the kind of pool
+        run_tasks([
+            partial(trackDb.generate, os.path.join(target_path, self.kwargs["genome"]), sink=sink)
+            for trackDb in self.trackDbs
+        ], workers=workers, sink=sink)
+
+    def generate_groups(self, target_path="", sink=None):
+
+        # generate groups.txt
+        sink = DirectorySink() if sink is None else sink
+        with sink.open(os.path.join(target_path, self.kwargs["groups"])) as groups_f:
+            for group in self.groups:
+                group.write(groups_f)
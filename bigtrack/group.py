@@ -6,6 +6,8 @@ from .track import Track
 
 class Group(HubComponent):
 
+    __slots__ = ("tracks",)
+
     default_kwargs = {
         "priority": 1,
         "defaultIsClosed": 0,
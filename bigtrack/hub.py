@@ -1,12 +1,24 @@
 #!/usr/bin/env python3
 
 import os
-from .hub_component import HubComponent
+import shutil
+import tempfile
+from functools import partial
+from .hub_component import HubComponent, default_mode, run_tasks
+from .archive import ArchiveSink
 from .genome import Genome
+from .manifest import ManifestSink
+from .query import TrackQuery
+from .sink import DirectorySink
+from .snapshot import load_snapshot, save_snapshot
+from .target import render_targets
+from .trackdb import TrackDb
 
 
 class Hub(HubComponent):
 
+    __slots__ = ("genomes",)
+
     default_kwargs = {
         "genomesFile": "genomes.txt",
     }
@@ -22,19 +34,176 @@ class Hub(HubComponent):
         if not isinstance(genome, Genome):
             raise ValueError(f"Genome must be an instance of Genome, not {type(genome)}.")
 
+        for other in self.genomes:
+            if other.kwargs["genome"] == genome.kwargs["genome"]:
+                raise ValueError(f"Hub: duplicate genome {genome.kwargs['genome']}.")
+
         genome.hub = self
         self.genomes.append(genome)
+
+    def save_snapshot(self, path):
+
+        # the whole Hub/Genome/Group/TrackDb/Track graph in one binary file
+        save_snapshot(self, path)
+
+    @classmethod
+    def load_snapshot(cls, path):
+
+        hub = load_snapshot(path)
+        if not isinstance(hub, cls):
+            raise ValueError(f"Snapshot: {path} holds a {hub.__class__.__name__}, not a {cls.__name__}.")
+        return hub
+
+    def query(self, predicate=None, genome=None, **settings):
+
+        # tracks of every genome, or of one genome, see Genome.query
+        nodes = []
+        for other in self.genomes:
+            if genome is None or other.kwargs["genome"] == genome:
+                nodes.extend(other.query(predicate, **settings))
+        return TrackQuery(nodes)
+
+    def find_track(self, name, genome=None):
+
+        # look up a track by name, in one genome or in every genome of the hub
+        for other in self.genomes:
+            if genome is None or other.kwargs["genome"] == genome:
+                track = other.find_track(name)
+                if track is not None:
+                    return track
+        return None
     
-    def generate(self, target_path=""):
+    def generate(self, target_path="", workers=None, trackDb_workers=None, incremental=False, staged=False, one_file=False, archive=None, archive_format=None, sink=None):
+
+        if one_file and len(self.genomes) != 1:
+            raise ValueError(f"Hub: one_file output requires exactly one genome, found {len(self.genomes)}.")
+
+        hub_dir = os.path.join(target_path, self.kwargs["hub"])
+
+        # render through a caller-provided sink, which the caller closes
+        if sink is not None:
+            if incremental or staged or archive is not None:
+                raise ValueError("Hub: sink cannot be combined with incremental, staged or archive output.")
+            self._generate(hub_dir, workers, trackDb_workers, sink, one_file)
+            return None
+
+        # stream every file into a tar or zip archive, nothing is written to target_path
+        if archive is not None:
+            if incremental or staged:
+                raise ValueError("Hub: archive output cannot be combined with incremental or staged output.")
+            sink = ArchiveSink(archive, root=target_path, archive_format=archive_format)
+            try:
+                self._generate(hub_dir, workers, trackDb_workers, sink, one_file)
+            finally:
+                sink.close()
+            return None
+
+        if not staged:
+            sink = ManifestSink(hub_dir) if incremental else DirectorySink()
+            self._generate(hub_dir, workers, trackDb_workers, sink, one_file)
+            sink.close()
+        else:
+            # render into a sibling directory, then swap it in with a rename
+            os.makedirs(target_path or ".", exist_ok=True)
+            stage_dir = tempfile.mkdtemp(dir=target_path or ".", prefix=f".{self.kwargs['hub']}.")
+            try:
+                os.chmod(stage_dir, default_mode(directory=True))
+                sink = ManifestSink(stage_dir, previous_root=hub_dir) if incremental else DirectorySink()
+                self._generate(stage_dir, workers, trackDb_workers, sink, one_file)
+                sink.close()
+            except BaseException:
+                shutil.rmtree(stage_dir, ignore_errors=True)
+                raise
+            self._swap_directory(stage_dir, hub_dir)
+
+        # report the files rewritten since the previous run
+        return sink.changed if incremental else None
 
-        os.makedirs(os.path.join(target_path, self.kwargs["hub"]), exist_ok=True)
+    def generate_targets(self, targets, target_path="", sink=None):
+
+        # several hub variants of this model in one pass, see Target
+        if sink is not None:
+            render_targets(self, targets, target_path, sink)
+            return
+
+        sink = DirectorySink()
+        render_targets(self, targets, target_path, sink)
+        sink.close()
+
+    def _generate(self, hub_dir, workers, trackDb_workers, sink, one_file=False):
+
+        sink.makedirs(hub_dir)
+
+        if one_file:
+            self._generate_one_file(hub_dir, sink)
+            return
 
         # generate hub.txt
-        with open(os.path.join(target_path, self.kwargs["hub"], "hub.txt"), "w") as hub_f:
-            hub_f.write(self.format())
+        with sink.open(os.path.join(hub_dir, "hub.txt")) as hub_f:
+            self.write(hub_f)
 
         # generate genomes.txt
-        with open(os.path.join(target_path, self.kwargs["hub"], "genomes.txt"), "w") as genomes_f:
+        with sink.open(os.path.join(hub_dir, "genomes.txt")) as genomes_f:
             for genome in self.genomes:
-                genomes_f.write(genome.format())
-                genome.generate(target_path=os.path.join(target_path, self.kwargs["hub"]))
+                genome.write(genomes_f)
+
+        # genomes.txt keeps its order, per-genome files may be rendered on a pool
+        run_tasks([
+            partial(genome.generate, target_path=hub_dir, workers=trackDb_workers, sink=sink)
+            for genome in self.genomes
+        ], workers=workers, sink=sink)
+
+    def _generate_one_file(self, hub_dir, sink):
+
+        # hub, genome and track stanzas all go to hub.txt (useOneFile on)
+        genome = self.genomes[0]
+        with sink.open(os.path.join(hub_dir, "hub.txt"), buffering=TrackDb.buffer_size) as hub_f:
+            for line in self._iter_kwargs(exclude=("genomesFile",)):
+                hub_f.write(line + "\n")
+            hub_f.write("useOneFile on\n\n")
+            genome.write(hub_f, exclude=("trackDb",) if genome.groups else ("trackDb", "groups"))
+            for trackDb in genome.trackDbs:
+                trackDb.write_tracks(hub_f)
+
+        # groups cannot be inlined, assembly hubs still point to groups.txt
+        if genome.groups:
+            sink.makedirs(os.path.join(hub_dir, genome.kwargs["genome"]))
+            genome.generate_groups(hub_dir, sink=sink)
+
+    def _swap_directory(self, stage_dir, hub_dir):
+
+        # hub_dir is a symlink to the current stage directory, re-pointed with one atomic rename
+        link_path = stage_dir + ".link"
+        try:
+            os.symlink(os.path.basename(stage_dir), link_path)
+        except OSError:
+            # no symlinks on this filesystem, fall back to two renames
+            self._rename_directory(stage_dir, hub_dir)
+            return
+
+        if os.path.islink(hub_dir) or not os.path.exists(hub_dir):
+            old_dir = os.path.realpath(hub_dir) if os.path.islink(hub_dir) else None
+            os.replace(link_path, hub_dir)
+            # only clean up directories staged by a previous run
+            stage_parent = os.path.realpath(os.path.dirname(stage_dir))
+            if old_dir is not None and os.path.dirname(old_dir) == stage_parent and os.path.basename(old_dir).startswith(f".{self.kwargs['hub']}."):
+                shutil.rmtree(old_dir, ignore_errors=True)
+            return
+
+        # a plain directory from an unstaged run is turned into the symlink once,
+        # later swaps are atomic
+        old_dir = stage_dir + ".old"
+        os.rename(hub_dir, old_dir)
+        os.replace(link_path, hub_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def _rename_directory(self, stage_dir, hub_dir):
+
+        if not os.path.exists(hub_dir):
+            os.rename(stage_dir, hub_dir)
+            return
+
+        old_dir = stage_dir + ".old"
+        os.rename(hub_dir, old_dir)
+        os.rename(stage_dir, hub_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
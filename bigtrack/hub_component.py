@@ -1,37 +1,158 @@
 #!/usr/bin/env python3
 
+import os
+import sys
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .formatter import get_formatter
+from .template import InheritedKwargs, TrackedDict
+
+
+# tasks of the running process pools, inherited by forked workers instead of being pickled
+_forked_tasks = {}
+_forked_keys = itertools.count()
+
+
+def _fork_available():
+
+    # forked workers share the parent's object graph; a worker does not start pools of its own
+    return "fork" in multiprocessing.get_all_start_methods() and multiprocessing.parent_process() is None
+
+
+def _run_forked_task(key, i):
+
+    tasks, sink = _forked_tasks[key]
+    sink._start_worker()
+    tasks[i]()
+    return sink._worker_result()
+
+
+def run_tasks(tasks, workers=None, sink=None):
+
+    # run tasks in order, or on a pool when more than one worker is requested:
+    # forked processes for sinks that write their own files, threads otherwise
+    if workers is None or workers <= 1:
+        for task in tasks:
+            task()
+        return
+
+    if sink is not None and sink.forkable and _fork_available():
+        key = next(_forked_keys)
+        _forked_tasks[key] = (tasks, sink)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork")) as executor:
+                futures = [executor.submit(_run_forked_task, key, i) for i in range(len(tasks))]
+                for future in futures:
+                    sink._merge_worker_result(future.result())
+        finally:
+            del _forked_tasks[key]
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        for future in futures:
+            future.result()
+
+
+def default_mode(directory=False):
+
+    # permissions for files created privately (mkstemp, mkdtemp) that end up in the hub
+    umask = os.umask(0)
+    os.umask(umask)
+    return (0o777 if directory else 0o666) & ~umask
+
 
 class HubComponent(object):
 
+    # no per-instance __dict__, settings live in kwargs only
+    __slots__ = ("kwargs", "_stanza")
+
     default_kwargs = {}
     required_keys = []
+    # keep the last rendered stanza until kwargs, parent or indentation change,
+    # off by default since it holds a second copy of the output in memory
+    cache_stanzas = False
 
-    def __init__(self, **kwargs):
+    def __init__(self, template=None, **kwargs):
 
-        self.kwargs = kwargs
+        # setting names repeat across every track, share one string per name
+        self.kwargs = TrackedDict((sys.intern(k), v) for k, v in kwargs.items())
+        self._stanza = None
+        # settings shared with a template are read from it, only overrides are stored
+        if template is not None:
+            self.kwargs = InheritedKwargs(self.kwargs, template)
         self._auto_complete_kwargs()
         self._validate_kwargs()
+        self._own_kwargs()
+
+    def _own_kwargs(self):
+
+        # later changes to kwargs are reported to _on_setting_change
+        kwargs = self.kwargs.delta if isinstance(self.kwargs, InheritedKwargs) else self.kwargs
+        if isinstance(kwargs, TrackedDict):
+            kwargs.owner = self
+
+    def _on_setting_change(self, key, old, new):
+
+        pass
     
+    def _formatter(self, exclude=()):
+
+        hidden_keys = self._hidden_keys()
+        if exclude:
+            hidden_keys = hidden_keys + tuple(exclude)
+        return get_formatter(self.__class__, hidden_keys)
+
+    def _iter_kwargs(self, indent_level=0, exclude=()):
+
+        return self._formatter(exclude).iter_lines(self.kwargs, indent_level=indent_level)
+
+    def __getstate__(self):
+
+        # rendered stanzas are not worth storing in copies and snapshots
+        state = {}
+        for cls in self.__class__.__mro__:
+            for k in getattr(cls, "__slots__", ()):
+                if hasattr(self, k):
+                    state[k] = getattr(self, k)
+        state["_stanza"] = None
+        return (getattr(self, "__dict__", None), state)
+
+    def _hidden_keys(self):
+
+        return ()
+
     def _print_kwargs(self, indent_level=0):
 
-        s = []
+        return list(self._iter_kwargs(indent_level=indent_level))
 
-        for k in self.required_keys:
-            if k.startswith("_"): continue
-            s.append(indent_level * 4 * " " + f"{k} {self.kwargs[k]}")
-        
-        for k, v in self.kwargs.items():
-            if k.startswith("_"): continue
-            if k not in self.required_keys:
-                s.append(indent_level * 4 * " " + f"{k} {v}")
+    def _render(self, indent_level=0, exclude=()):
 
-        return s
+        formatter = self._formatter(exclude)
+        kwargs = self.kwargs
+        # plain dicts assigned to kwargs cannot report changes and are never cached
+        version = getattr(kwargs, "version", None)
+        if version is None or not self.cache_stanzas:
+            return formatter.render(kwargs, indent_level=indent_level)
+
+        # the formatter already encodes class, hidden keys (parent) and excluded keys
+        stanza = self._stanza
+        if stanza is not None and stanza[0] is kwargs and stanza[1] == version and stanza[2] is formatter and stanza[3] == indent_level:
+            return stanza[4]
+
+        text = formatter.render(kwargs, indent_level=indent_level)
+        self._stanza = (kwargs, version, formatter, indent_level, text)
+        return text
 
     def format(self, indent_level=0):
 
-        s = self._print_kwargs(indent_level=indent_level)
-        s.append("")
-        return "\n".join(s) + "\n"
+        return self._render(indent_level=indent_level)
+
+    def write(self, file_handle, indent_level=0, exclude=()):
+
+        # one write per stanza, never a whole track block
+        file_handle.write(self._render(indent_level=indent_level, exclude=exclude))
 
     def _auto_complete_kwargs(self):
 
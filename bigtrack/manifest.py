@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from .hub_component import default_mode
+from .sink import Sink
+
+
+class ManifestSink(Sink):
+
+    file_name = ".manifest.json"
+    chunk_size = 1 << 20
+    forkable = True
+
+    def __init__(self, root, previous_root=None):
+
+        self.root = root
+        self.path = os.path.join(root, self.file_name)
+        # files from the previous run may live elsewhere, e.g. when staging
+        self.previous_root = root if previous_root is None else previous_root
+        self.previous = self._load()
+        self.current = {}
+        self.changed = []
+        # outputs of the previous run that this run did not write
+        self.removed = []
+        self._lock = threading.Lock()
+        self._mode = default_mode()
+
+    def _load(self):
+
+        try:
+            with open(os.path.join(self.previous_root, self.file_name), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _digest(self, path):
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def makedirs(self, path):
+
+        os.makedirs(path, exist_ok=True)
+
+    @contextmanager
+    def open(self, path, buffering=-1):
+
+        # render next to the target, then keep the old file if nothing changed
+        key = os.path.relpath(path, self.root)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", buffering=buffering) as f:
+                yield f
+            entry = {"sha256": self._digest(tmp_path), "size": os.path.getsize(tmp_path)}
+            previous_path = os.path.join(self.previous_root, key)
+            unchanged = (
+                self.previous.get(key) == entry
+                and os.path.isfile(previous_path)
+                and os.path.getsize(previous_path) == entry["size"]
+            )
+            if unchanged:
+                os.remove(tmp_path)
+                if previous_path != path:
+                    self._reuse(previous_path, path)
+            else:
+                os.chmod(tmp_path, self._mode)
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self.current[key] = entry
+            if not unchanged:
+                self.changed.append(key)
+
+    def _reuse(self, previous_path, path):
+
+        # keep the previous inode and modification time
+        try:
+            os.link(previous_path, path)
+        except OSError:
+            shutil.copy2(previous_path, path)
+
+    def _start_worker(self):
+
+        # a worker reports only the files of its own task
+        self.current = {}
+        self.changed = []
+        self._lock = threading.Lock()
+
+    def _worker_result(self):
+
+        return self.current, self.changed
+
+    def _merge_worker_result(self, result):
+
+        current, changed = result
+        with self._lock:
+            self.current.update(current)
+            self.changed.extend(changed)
+
+    def close(self):
+
+        self.save()
+
+    def _remove_stale(self):
+
+        # files are only deleted in place, a staged directory never contains them
+        self.removed = sorted(key for key in self.previous if key not in self.current)
+        if self.previous_root != self.root:
+            return
+        for key in self.removed:
+            if key.startswith(".."):
+                continue
+            path = os.path.join(self.root, key)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            # directories of dropped genomes go too, once empty
+            directory = os.path.dirname(path)
+            while directory and os.path.normpath(directory) != os.path.normpath(self.root):
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    break
+                directory = os.path.dirname(directory)
+
+    def save(self):
+
+        self._remove_stale()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.current, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        # removed files are changes too
+        self.changed.extend(self.removed)
+        self.changed.sort()
@@ -5,6 +5,8 @@ from .track import Track
 
 class MultiWig(Track):
 
+    __slots__ = ()
+
     default_kwargs = {
         "parent": None,
         "container": "multiWig",
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+from .template import InheritedKwargs, Template
+from .track_columns import TrackColumns
+
+
+def is_view(node):
+
+    # views read settings from another track, which can change them without telling the view
+    kwargs = getattr(node, "kwargs", None)
+    return isinstance(kwargs, InheritedKwargs) and not isinstance(kwargs.base, Template)
+
+
+def node_setting(node, key):
+
+    # a columnar block is matched as a unit: by a shared setting, or by a column with a single value
+    if isinstance(node, TrackColumns):
+        if key in node.template:
+            return node.template[key]
+        column = node.columns.get(key)
+        if column is not None and len(set(column)) == 1:
+            return column[0]
+        return None
+    return node.kwargs.get(key)
+
+
+def setting_matches(node, key, value):
+
+    actual = node_setting(node, key)
+    if key == "type" and actual is not None:
+        # "bigBed" matches "bigBed 9 +"
+        actual, value = str(actual), str(value)
+        return actual == value or actual.startswith(value + " ")
+    return actual == value
+
+
+def node_genome(node):
+
+    parent = node.parent if isinstance(node, TrackColumns) else node
+    return parent.get_genome() if parent is not None else None
+
+
+class TrackQuery(object):
+
+    __slots__ = ("nodes",)
+
+    def __init__(self, nodes):
+
+        # tracks and columnar blocks, in index order
+        self.nodes = list(nodes)
+
+    def __iter__(self):
+
+        return iter(self.nodes)
+
+    def __len__(self):
+
+        return len(self.nodes)
+
+    def names(self):
+
+        names = []
+        for node in self.nodes:
+            if isinstance(node, TrackColumns):
+                names.extend(node.columns["track"])
+            else:
+                names.append(node.kwargs["track"])
+        return names
+
+    def filter(self, predicate=None, **settings):
+
+        nodes = [node for node in self.nodes
+                 if all(setting_matches(node, k, v) for k, v in settings.items())
+                 and (predicate is None or predicate(node))]
+        return TrackQuery(nodes)
+
+    def set(self, **kwargs):
+
+        # change settings of every matched track, the genome indexes follow through the kwargs owner
+        for node in self.nodes:
+            if isinstance(node, TrackColumns):
+                if "track" in kwargs:
+                    raise ValueError(f"{self.__class__.__name__}: track cannot be set on columnar children.")
+                for k, v in kwargs.items():
+                    if k in node.columns:
+                        node._on_setting_change(k, node_setting(node, k), v)
+                        node.columns[k] = [v] * len(node)
+                    else:
+                        node.template[k] = v
+            else:
+                for k, v in kwargs.items():
+                    node.kwargs[k] = v
+        return self
+
+    def prune(self):
+
+        # detach every matched track with its subtree, each container is rebuilt once
+        removed = {}
+        containers = {}
+        for node in self.nodes:
+            genome = node_genome(node)
+            if genome is not None:
+                genome._unindex_tracks([node])
+            if node.parent is not None:
+                container = node.parent.children
+            elif getattr(node, "trackDb", None) is not None:
+                container = node.trackDb.tracks
+            else:
+                continue
+            removed[id(node)] = node
+            containers[id(container)] = container
+
+        for container in containers.values():
+            container[:] = [track for track in container if id(track) not in removed]
+
+        for node in removed.values():
+            node.parent = None
+            if not isinstance(node, TrackColumns):
+                node.trackDb = None
+        return self
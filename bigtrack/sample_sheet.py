@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import os
+import re
+import csv
+from string import Formatter
+
+TAG_PATTERN = re.compile(r"\W")
+
+
+def read_sample_sheet(path, delimiter=None):
+
+    # header and rows of a TSV/CSV file, read in one pass
+    if delimiter is None:
+        delimiter = "," if os.path.splitext(path)[1].lower() == ".csv" else "\t"
+
+    with open(path, "r", newline="") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = next(reader, None)
+        if header is None:
+            raise ValueError(f"SampleSheet: {path} is empty.")
+        rows = [row for row in reader if row]
+
+    for i, row in enumerate(rows):
+        if len(row) != len(header):
+            raise ValueError(f"SampleSheet: row {i + 2} of {path} has {len(row)} fields, expected {len(header)}.")
+    return header, rows
+
+
+def pattern_column(pattern, sheet, records):
+
+    # "{sample}_{tissue}" is turned into "%s_%s" and filled from the columns, a bare "{url}" is the column itself
+    parts = []
+    fields = []
+    for literal, field, spec, conversion in Formatter().parse(pattern):
+        parts.append(literal.replace("%", "%%"))
+        if field is None:
+            continue
+        if field not in sheet:
+            raise ValueError(f"SampleSheet: column {field} not found in sample sheet.")
+        if spec or conversion:
+            # format specs are rare, format each row
+            return [pattern.format_map(record) for record in records()]
+        parts.append("%s")
+        fields.append(sheet[field])
+
+    template = "".join(parts)
+    if not fields:
+        # only escaped braces, the same text for every row
+        return None
+    if template == "%s":
+        return fields[0]
+    return [template % values for values in zip(*fields)]
+
+
+def sample_sheet_columns(header, rows, settings):
+
+    # settings with a {column} pattern become columns, the others are shared by every row
+    if "track" not in settings:
+        raise ValueError("SampleSheet: a track name pattern is required, e.g. track=\"{sample}\".")
+
+    sheet = dict(zip(header, map(list, zip(*rows)))) if rows else {k: [] for k in header}
+
+    def records():
+        return (dict(zip(header, row)) for row in rows)
+
+    columns = {}
+    shared = {}
+    for k, v in settings.items():
+        column = pattern_column(v, sheet, records) if isinstance(v, str) and "{" in v else None
+        if column is not None:
+            columns[k] = column
+        elif isinstance(v, str) and "{" in v:
+            shared[k] = v.format()
+        else:
+            shared[k] = v
+
+    # UCSC track names hold only letters, digits and _, sheet values are cleaned like subgroup tags
+    if "track" in columns:
+        columns["track"] = [subgroup_tag(name) for name in columns["track"]]
+    return sheet, columns, shared
+
+
+def join_pairs(sheet, names, pair):
+
+    # pairs are built once per distinct value, then joined per row
+    columns = []
+    for name in names:
+        pairs = {value: pair(name, value) for value in set(sheet[name])}
+        columns.append(map(pairs.__getitem__, sheet[name]))
+    return list(map(" ".join, zip(*columns)))
+
+
+def metadata_column(sheet, names):
+
+    # key=value pairs, values with spaces are quoted as UCSC expects
+    return join_pairs(sheet, names, lambda name, value: f'{name}="{value}"' if " " in value else f"{name}={value}")
+
+
+def subgroup_tag(value):
+
+    return TAG_PATTERN.sub("_", value)
+
+
+def subgroups_column(sheet, names):
+
+    return join_pairs(sheet, names, lambda name, value: f"{name}={subgroup_tag(value)}")
+
+
+def subgroup_definitions(sheet, names):
+
+    # "name label tag=label ..." for each subgroup, tags in order of first appearance
+    definitions = {}
+    for name in names:
+        tags = dict.fromkeys(map(subgroup_tag, dict.fromkeys(sheet[name])))
+        definitions[name] = f"{name} {name} " + " ".join(f"{tag}={tag}" for tag in tags)
+    return definitions
@@ -1,24 +1,95 @@
 #!/usr/bin/env python3
 
-import copy
 import random
+import shlex
+from collections.abc import Sequence
 from .composite_track import CompositeTrack
+from .child_provider import ChildProvider
+
+
+def reservoir_sample(iterable, number, rng, key=None):
+
+    # single pass over iterable, keeping at most number items per stratum (key(item))
+    reservoirs = {}
+    seen = {}
+    for i, item in enumerate(iterable):
+        stratum = None if key is None else key(item)
+        reservoir = reservoirs.setdefault(stratum, [])
+        seen[stratum] = seen.get(stratum, 0) + 1
+        if len(reservoir) < number:
+            reservoir.append((i, item))
+        else:
+            j = rng.randrange(seen[stratum])
+            if j < number:
+                reservoir[j] = (i, item)
+
+    # selected items keep their original order
+    return [item for _, item in sorted((entry for reservoir in reservoirs.values() for entry in reservoir), key=lambda entry: entry[0])]
+
+
+def track_metadata(track, key):
+
+    # a setting of its own, otherwise a key=value pair in subGroups or metadata
+    if key in track.kwargs:
+        return track.kwargs[key]
+    for setting in ("subGroups", "metadata"):
+        if setting in track.kwargs:
+            for pair in shlex.split(str(track.kwargs[setting])):
+                k, _, v = pair.partition("=")
+                if k == key:
+                    return v
+    return None
 
 
 class SampledCompositeTrack(CompositeTrack):
 
-    def __init__(self, full_track: CompositeTrack, number: int, random_seed: int = 0, suffix: str = "_subset", **kwargs):
+    __slots__ = ()
+
+    def __init__(self, full_track: CompositeTrack, number: int, random_seed: int = 0, suffix: str = "_subset", children=None, stratify=None, **kwargs):
 
         super().__init__(**full_track.kwargs)
-        self.parent = full_track.parent
 
         # update track identifier to avoid conflicts
         self.kwargs["track"] = self.kwargs["track"] + suffix
-        random.seed(random_seed)
-        for child in random.sample(full_track.children, k=number):
-            child_copy = copy.deepcopy(child)
-            child_copy.kwargs["track"] = child_copy.kwargs["track"] + suffix
-            self.add_child(child_copy)
+
+        # a private generator, the global random state is left alone
+        rng = random.Random(random_seed)
+        if children is None:
+            # sampling reads the provided children, a one-shot iterable would leave none for the full track
+            for child in full_track.children:
+                if isinstance(child, ChildProvider) and not callable(child.provider):
+                    raise ValueError(f"{self.__class__.__name__}: children of {full_track.kwargs['track']} come from a one-shot iterable, pass a callable to add_child_provider to sample them.")
+            children = full_track.iter_children()
+            # provided children are streamed, everything else keeps the list-based selection
+            if not any(isinstance(child, ChildProvider) for child in full_track.children):
+                children = list(children)
+
+        if stratify is not None:
+            # number children per stratum, e.g. per population
+            key = stratify if callable(stratify) else lambda child: track_metadata(child, stratify)
+            sampled = reservoir_sample(children, number, rng, key=key)
+        elif isinstance(children, Sequence):
+            sampled = rng.sample(children, k=number)
+        else:
+            # streamed children are sampled in one pass without holding them all
+            sampled = reservoir_sample(children, number, rng)
+            if len(sampled) < number:
+                raise ValueError(f"{self.__class__.__name__}: cannot sample {number} children from {len(sampled)}.")
+
+        for child in sampled:
+            # children are views that share the original settings, descendants are renamed too
+            child_view = child.view(track=child.kwargs["track"] + suffix)
+            self.add_child(child_view)
+            stack = [(child, child_view)]
+            while stack:
+                original, original_view = stack.pop()
+                for grandchild in original.iter_children():
+                    grandchild_view = grandchild.view(track=grandchild.kwargs["track"] + suffix)
+                    original_view.add_child(grandchild_view)
+                    stack.append((grandchild, grandchild_view))
+
+        # set last, so the subset is not indexed in the genome before it is attached
+        self.parent = full_track.parent
 
         # update remaining new args
         for k, v in kwargs.items():
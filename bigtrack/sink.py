@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import io
+import os
+from contextlib import contextmanager
+
+
+class Sink(object):
+
+    # sinks that write their own files can be used from forked worker processes, see run_tasks
+    forkable = False
+
+    def makedirs(self, path):
+
+        pass
+
+    def open(self, path, buffering=-1):
+
+        raise NotImplementedError(f"{self.__class__.__name__}: subclasses must implement their own open() method.")
+
+    def close(self):
+
+        pass
+
+    # a forked worker starts each task with _start_worker, and what it recorded
+    # is sent back by _worker_result and merged into the parent's sink
+    def _start_worker(self):
+
+        pass
+
+    def _worker_result(self):
+
+        return None
+
+    def _merge_worker_result(self, result):
+
+        pass
+
+
+class DirectorySink(Sink):
+
+    forkable = True
+
+    def __init__(self, root=""):
+
+        self.root = root
+
+    def makedirs(self, path):
+
+        os.makedirs(os.path.join(self.root, path), exist_ok=True)
+
+    def open(self, path, buffering=-1):
+
+        return open(os.path.join(self.root, path), "w", buffering=buffering)
+
+
+class MemorySink(Sink):
+
+    def __init__(self):
+
+        self.files = {}
+
+    @contextmanager
+    def open(self, path, buffering=-1):
+
+        with io.StringIO() as f:
+            yield f
+            self.files[path] = f.getvalue()
+
+
+class _NullWriter(object):
+
+    def write(self, s):
+
+        return len(s)
+
+
+class NullSink(Sink):
+
+    @contextmanager
+    def open(self, path, buffering=-1):
+
+        # formatting still happens, only the writes are discarded
+        yield _NullWriter()
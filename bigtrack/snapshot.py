@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+
+import io
+import os
+import pickle
+import struct
+
+MAGIC = b"BIGTRACK"
+SNAPSHOT_VERSION = 2
+
+
+def _package_version():
+
+    from . import __version__
+    return __version__.encode("utf-8")
+
+
+def _collect_nodes(obj):
+
+    # tracks, columnar blocks and providers reachable from hubs, genomes, trackDbs and tracks
+    from .hub import Hub
+    from .genome import Genome
+    from .trackdb import TrackDb
+    from .track import Track, walk_tracks
+
+    roots = []
+    pending = [obj]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, (tuple, list)):
+            pending.extend(item)
+        elif isinstance(item, Hub):
+            pending.extend(item.genomes)
+        elif isinstance(item, Genome):
+            pending.extend(item.trackDbs)
+        elif isinstance(item, TrackDb):
+            roots.extend(item.tracks)
+        elif isinstance(item, Track):
+            roots.append(item)
+    return [node for node, _ in walk_tracks(roots, expand_providers=False)]
+
+
+class _FlatPickler(pickle.Pickler):
+
+    # tracks are written without their parent and children, which are stored as indexes,
+    # so a deep tree does not make pickle recurse once per level
+    def __init__(self, f, nodes):
+
+        super().__init__(f, protocol=pickle.HIGHEST_PROTOCOL)
+        self.node_ids = {id(node): i for i, node in enumerate(nodes)}
+
+    def reducer_override(self, obj):
+
+        if id(obj) not in self.node_ids:
+            return NotImplemented
+        reduced = obj.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+        dict_state, slot_state = reduced[2] if isinstance(reduced[2], tuple) else (reduced[2], None)
+        slot_state = dict(slot_state or {})
+        if slot_state.get("parent") is None or id(slot_state["parent"]) in self.node_ids:
+            slot_state.pop("parent", None)
+        if isinstance(slot_state.get("children"), list):
+            slot_state.pop("children")
+        return reduced[0], reduced[1], (dict_state, slot_state)
+
+
+def _node_links(nodes):
+
+    node_ids = {id(node): i for i, node in enumerate(nodes)}
+    parents = [node_ids.get(id(node.parent), -1) for node in nodes]
+    children = [[node_ids[id(child)] for child in node.children] if isinstance(node.children, list) else None for node in nodes]
+    return parents, children
+
+
+def _restore_links(nodes, parents, children):
+
+    for node, parent, node_children in zip(nodes, parents, children):
+        if parent >= 0:
+            node.parent = nodes[parent]
+        elif not hasattr(node, "parent"):
+            node.parent = None
+        if node_children is not None:
+            node.children = [nodes[i] for i in node_children]
+
+
+def save_snapshot(obj, path):
+
+    # header: magic, snapshot format version, bigtrack version, then the pickled object graph
+    try:
+        nodes = _collect_nodes(obj)
+        with io.BytesIO() as f:
+            _FlatPickler(f, nodes).dump((obj, nodes, _node_links(nodes)))
+            payload = f.getvalue()
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        raise ValueError(f"Snapshot: cannot serialize {obj.__class__.__name__} ({e}). Lazy child providers must be module-level callables.") from e
+    except RecursionError as e:
+        raise ValueError(f"Snapshot: {obj.__class__.__name__} is nested too deeply to serialize outside of its tracks.") from e
+
+    package_version = _package_version()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack(">HH", SNAPSHOT_VERSION, len(package_version)))
+        f.write(package_version)
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path):
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Snapshot: {path} is not a bigtrack snapshot.")
+        header = f.read(4)
+        if len(header) != 4:
+            raise ValueError(f"Snapshot: {path} is truncated.")
+        snapshot_version, length = struct.unpack(">HH", header)
+        package_version = f.read(length)
+        if len(package_version) != length:
+            raise ValueError(f"Snapshot: {path} is truncated.")
+        # object layouts change between releases, stale snapshots must be rebuilt
+        if snapshot_version != SNAPSHOT_VERSION or package_version != _package_version():
+            raise ValueError(
+                f"Snapshot: {path} was written by bigtrack {package_version.decode('utf-8', 'replace')} "
+                f"(format {snapshot_version}), expected bigtrack {_package_version().decode('utf-8')} (format {SNAPSHOT_VERSION})."
+            )
+        try:
+            obj, nodes, (parents, children) = pickle.load(f)
+        except Exception as e:
+            # a truncated payload, or classes that changed without a version bump
+            raise ValueError(f"Snapshot: cannot load {path} ({e.__class__.__name__}: {e}).") from e
+        _restore_links(nodes, parents, children)
+        return obj
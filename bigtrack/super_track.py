@@ -5,6 +5,8 @@ from .track import Track
 
 class SuperTrack(Track):
 
+    __slots__ = ()
+
     default_kwargs = {
         "superTrack": "on",
         "parent": None,
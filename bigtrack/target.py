@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import os
+from contextlib import ExitStack
+from .track import walk_tracks
+from .track_columns import TrackColumns
+
+
+class Target(object):
+
+    __slots__ = ("genomes", "drop", "exclude", "settings")
+
+    def __init__(self, genomes=None, drop=(), exclude=(), **settings):
+
+        # genome id -> genome id in this target, None leaves the genome out
+        self.genomes = dict(genomes or {})
+        # settings left out of every stanza, e.g. twoBitPath for a GenArk hub
+        self.drop = tuple(drop)
+        # track names left out with their subtracks
+        self.exclude = frozenset(exclude)
+        # hub settings of this target, e.g. hub="ExampleHub_UCSC"
+        self.settings = settings
+
+    def genome_id(self, genome):
+
+        genome_id = genome.kwargs["genome"]
+        return self.genomes.get(genome_id, genome_id)
+
+    def dropped(self, kwargs):
+
+        return tuple(k for k in self.drop if k in kwargs)
+
+    def hub_kwargs(self, hub):
+
+        kwargs = dict(hub.kwargs)
+        kwargs.update(self.settings)
+        return kwargs
+
+    def genome_kwargs(self, genome):
+
+        # the genome id is also the directory of its trackDb.txt and groups.txt
+        old_id = genome.kwargs["genome"]
+        new_id = self.genome_id(genome)
+        kwargs = dict(genome.kwargs)
+        kwargs["genome"] = new_id
+        if new_id != old_id:
+            for k in ("trackDb", "groups"):
+                if k in kwargs and str(kwargs[k]).startswith(old_id + "/"):
+                    kwargs[k] = new_id + kwargs[k][len(old_id):]
+        return kwargs
+
+
+class FanOut(object):
+
+    __slots__ = ("files",)
+
+    def __init__(self, files):
+
+        # every write goes to each file
+        self.files = files
+
+    def write(self, text):
+
+        for f in self.files:
+            f.write(text)
+
+
+def render_targets(hub, targets, target_path, sink):
+
+    hub_dirs = [os.path.join(target_path, target.settings.get("hub", hub.kwargs["hub"])) for target in targets]
+    if len(set(hub_dirs)) != len(hub_dirs):
+        raise ValueError("Target: every target needs its own hub name.")
+
+    for target, hub_dir in zip(targets, hub_dirs):
+        sink.makedirs(hub_dir)
+        with sink.open(os.path.join(hub_dir, "hub.txt")) as hub_f:
+            kwargs = target.hub_kwargs(hub)
+            hub_f.write(hub._formatter(target.dropped(kwargs)).render(kwargs))
+        with sink.open(os.path.join(hub_dir, "genomes.txt")) as genomes_f:
+            for genome in hub.genomes:
+                if target.genome_id(genome) is not None:
+                    kwargs = target.genome_kwargs(genome)
+                    genomes_f.write(genome._formatter(target.dropped(kwargs)).render(kwargs))
+
+    for genome in hub.genomes:
+        outputs = [(target, hub_dir) for target, hub_dir in zip(targets, hub_dirs) if target.genome_id(genome) is not None]
+        if outputs:
+            render_genome(genome, outputs, sink)
+
+
+def render_genome(genome, outputs, sink):
+
+    for target, hub_dir in outputs:
+        kwargs = target.genome_kwargs(genome)
+        sink.makedirs(os.path.join(hub_dir, kwargs["genome"]))
+        with sink.open(os.path.join(hub_dir, kwargs["groups"])) as groups_f:
+            for group in genome.groups:
+                group.write(groups_f, exclude=target.dropped(group.kwargs))
+        with sink.open(os.path.join(hub_dir, kwargs["trackDb"])) as trackDb_f:
+            for trackDb in genome.trackDbs:
+                trackDb.write(trackDb_f)
+
+    # every include file is walked once, whatever the number of targets
+    for trackDb in genome.trackDbs:
+        with ExitStack() as stack:
+            files = [
+                stack.enter_context(sink.open(
+                    os.path.join(hub_dir, target.genome_id(genome), trackDb.kwargs["include"]),
+                    buffering=trackDb.buffer_size,
+                ))
+                for target, hub_dir in outputs
+            ]
+            write_tracks(trackDb.tracks, [target for target, _ in outputs], files)
+
+
+def write_tracks(tracks, targets, files):
+
+    # a target skips an excluded track and everything below it
+    skip_levels = [None] * len(targets)
+    for track, level in walk_tracks(tracks):
+        renders = {}
+        for i, target in enumerate(targets):
+            if skip_levels[i] is not None:
+                if level > skip_levels[i]:
+                    continue
+                skip_levels[i] = None
+
+            if isinstance(track, TrackColumns):
+                key = (target.dropped(track.template) + target.dropped(track.columns), target.exclude.intersection(track.columns["track"]))
+            else:
+                if track.kwargs["track"] in target.exclude:
+                    skip_levels[i] = level
+                    continue
+                key = target.dropped(track.kwargs)
+            renders.setdefault(key, []).append(files[i])
+
+        # stanzas shared by several targets are formatted once, columnar blocks one row at a time
+        for key, key_files in renders.items():
+            if isinstance(track, TrackColumns):
+                out = key_files[0] if len(key_files) == 1 else FanOut(key_files)
+                track.write(out, indent_level=level, exclude=key[0], exclude_tracks=key[1])
+            else:
+                text = track._render(indent_level=level, exclude=key)
+                for f in key_files:
+                    f.write(text)
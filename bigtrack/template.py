@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+
+import sys
+from collections.abc import Mapping, MutableMapping
+
+
+class TrackedDict(dict):
+
+    __slots__ = ("version", "owner")
+
+    # every mutation bumps the version, so rendered stanzas know when they are stale,
+    # and is announced to the owning component first, so it can keep indexes current
+    def __init__(self, *args, **kwargs):
+
+        super().__init__(*args, **kwargs)
+        self.version = 0
+        self.owner = None
+
+    def _notify(self, key, value):
+
+        if self.owner is not None:
+            self.owner._on_setting_change(key, self.get(key, None), value)
+
+    def __setitem__(self, key, value):
+
+        self._notify(key, value)
+        self._assign(key, value)
+
+    def __delitem__(self, key):
+
+        if key in self:
+            self._notify(key, None)
+        self._remove(key)
+
+    # changes without a notification, for InheritedKwargs, which notifies with merged values
+    def _assign(self, key, value):
+
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def _remove(self, key):
+
+        super().__delitem__(key)
+        self.version += 1
+
+    def __ior__(self, other):
+
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+
+        for k, v in dict(*args, **kwargs).items():
+            self[k] = v
+
+    def setdefault(self, key, default=None):
+
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def pop(self, key, *args):
+
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return super().pop(key, *args)
+
+    def popitem(self):
+
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self))
+        return key, self.pop(key)
+
+    def clear(self):
+
+        for key in list(self):
+            del self[key]
+
+    # copies and pickles start over at version 0
+    def __reduce__(self):
+
+        return (self.__class__, (dict(self),), (None, {"owner": self.owner}))
+
+
+class Template(Mapping):
+
+    __slots__ = ("_settings",)
+
+    def __init__(self, **kwargs):
+
+        self._settings = {sys.intern(k): v for k, v in kwargs.items()}
+
+    def __getitem__(self, key):
+
+        return self._settings[key]
+
+    def __iter__(self):
+
+        return iter(self._settings)
+
+    def __len__(self):
+
+        return len(self._settings)
+
+    def __repr__(self):
+
+        return f"{self.__class__.__name__}({self._settings!r})"
+
+    def derive(self, **kwargs):
+
+        # a new template with some settings overridden, this one is left untouched
+        return Template(**{**self._settings, **kwargs})
+
+    # templates are immutable, copies can share them
+    def __copy__(self):
+
+        return self
+
+    def __deepcopy__(self, memo):
+
+        return self
+
+    def __reduce__(self):
+
+        return (_make_template, (self._settings,))
+
+
+def _make_template(settings):
+
+    return Template(**settings)
+
+
+class _Deleted(object):
+
+    __slots__ = ()
+
+    # copies and pickles resolve to the module-level singleton
+    def __reduce__(self):
+
+        return "_DELETED"
+
+    def __repr__(self):
+
+        return "<deleted>"
+
+
+# marks a template setting that was deleted on one component
+_DELETED = _Deleted()
+
+
+class InheritedKwargs(MutableMapping):
+
+    __slots__ = ("delta", "base")
+
+    def __init__(self, delta, base):
+
+        # own settings first, everything else is read from the shared base
+        self.delta = delta
+        self.base = base
+
+    def __getitem__(self, key):
+
+        if key in self.delta:
+            value = self.delta[key]
+            if value is _DELETED:
+                raise KeyError(key)
+            return value
+        return self.base[key]
+
+    def _notify(self, key, value):
+
+        # the owner sees the inherited value as the old one, not only the delta
+        owner = getattr(self.delta, "owner", None)
+        if owner is not None:
+            owner._on_setting_change(key, self.get(key, None), value)
+
+    def __setitem__(self, key, value):
+
+        self._notify(key, value)
+        if isinstance(self.delta, TrackedDict):
+            self.delta._assign(key, value)
+        else:
+            self.delta[key] = value
+
+    def __delitem__(self, key):
+
+        if key not in self:
+            raise KeyError(key)
+        self._notify(key, None)
+        if key in self.base:
+            value = _DELETED
+            if isinstance(self.delta, TrackedDict):
+                self.delta._assign(key, value)
+            else:
+                self.delta[key] = value
+        elif isinstance(self.delta, TrackedDict):
+            self.delta._remove(key)
+        else:
+            del self.delta[key]
+
+    def __contains__(self, key):
+
+        if key in self.delta:
+            return self.delta[key] is not _DELETED
+        return key in self.base
+
+    def __iter__(self):
+
+        for k, v in self.delta.items():
+            if v is not _DELETED:
+                yield k
+        for k in self.base:
+            if k not in self.delta:
+                yield k
+
+    def __len__(self):
+
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+
+        return f"{self.__class__.__name__}({dict(self)!r})"
+
+    @property
+    def version(self):
+
+        # versions only grow, so the sum changes whenever either side changes
+        delta_version = getattr(self.delta, "version", None)
+        base_version = 0 if isinstance(self.base, Template) else getattr(self.base, "version", None)
+        if delta_version is None or base_version is None:
+            return None
+        return delta_version + base_version
+
+    def items(self):
+
+        for k, v in self.delta.items():
+            if v is not _DELETED:
+                yield k, v
+        for k, v in self.base.items():
+            if k not in self.delta:
+                yield k, v
@@ -1,10 +1,35 @@
 #!/usr/bin/env python3
 
+import sys
 from .hub_component import HubComponent
+from .template import InheritedKwargs, TrackedDict
+from .track_columns import INDEXED_SETTINGS, TrackColumns
+from .child_provider import ChildProvider
+
+
+
+def walk_tracks(tracks, indent_level=0, expand_providers=True):
+
+    # yield (track, indent_level) in file order with an explicit stack of child iterators
+    stack = [(iter(tracks), indent_level)]
+    while stack:
+        children, level = stack[-1]
+        child = next(children, None)
+        if child is None:
+            stack.pop()
+            continue
+        # provided children take the place of their provider
+        if expand_providers and isinstance(child, ChildProvider):
+            stack.append((iter(child), level))
+            continue
+        yield child, level
+        stack.append((iter(child.children), level + 1))
 
 
 class Track(HubComponent):
 
+    __slots__ = ("parent", "children", "trackDb")
+
     default_kwargs = {
         "parent": None,
     }
@@ -15,29 +40,92 @@ class Track(HubComponent):
         super().__init__(**kwargs)
         self.parent = None
         self.children = []
+        # set on top-level tracks by TrackDb.add_track
+        self.trackDb = None
     
-    def format(self, indent_level=0):
+    def _hidden_keys(self):
 
-        s = self._print_kwargs(indent_level=indent_level)
-        s.append("")
+        # top-level tracks have no parent line
         if self.parent is None:
-            del s[self.required_keys.index("parent")]
-        return "\n".join(s) + "\n"
+            return ("parent",)
+        return ()
         
     def add_parent(self, parent: "Track"):
 
+        genome = parent.get_genome()
+        if genome is not None:
+            genome._index_tracks([self])
+
         self.parent = parent
         self.kwargs["parent"] = parent.kwargs["track"]
         parent.children.append(self)
     
     def add_child(self, child: "Track"):
 
+        genome = self.get_genome()
+        if genome is not None:
+            genome._index_tracks([child])
+
         child.parent = self
         child.kwargs["parent"] = self.kwargs["track"]
         self.children.append(child)
 
-    def generate(self, file_handle=None, indent_level=0):
+    def view(self, **kwargs):
+
+        # a detached track of the same class that reads every setting it does not override from this one
+        track = object.__new__(self.__class__)
+        track.kwargs = InheritedKwargs(TrackedDict((sys.intern(k), v) for k, v in kwargs.items()), self.kwargs)
+        track._stanza = None
+        track.parent = None
+        track.children = []
+        track.trackDb = None
+        track._own_kwargs()
+        return track
+
+    def _on_setting_change(self, key, old, new):
+
+        # keep the genome's name and setting indexes current
+        if key != "track" and key not in INDEXED_SETTINGS:
+            return
+        genome = self.get_genome()
+        if genome is not None:
+            genome._reindex(self, key, old, new)
 
+    def add_child_provider(self, provider):
+
+        # children produced by provider only when the trackDb file is written
+        child_provider = ChildProvider(provider)
+        child_provider.parent = self
+        self.children.append(child_provider)
+        return child_provider
+
+    def get_genome(self):
+
+        # the genome this track is attached to, through its top-level track
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if root.trackDb is None:
+            return None
+        return root.trackDb.genome
+
+    def iter_children(self):
+
+        # direct children, with columnar blocks and providers expanded into tracks
         for child in self.children:
-            file_handle.write(child.format(indent_level=indent_level+1))
-            child.generate(file_handle, indent_level=indent_level+1)
+            if isinstance(child, TrackColumns):
+                yield from child.rows()
+            elif isinstance(child, ChildProvider):
+                yield from child
+            else:
+                yield child
+
+    def walk(self, indent_level=0):
+
+        # yield (descendant, indent_level) in file order
+        return walk_tracks(self.children, indent_level=indent_level + 1)
+
+    def generate(self, file_handle=None, indent_level=0):
+
+        for child, level in self.walk(indent_level=indent_level):
+            child.write(file_handle, indent_level=level)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+
+import io
+import sys
+from collections.abc import MutableMapping
+from .template import TrackedDict, _DELETED
+
+# settings with a secondary index in each genome, built by the first query, see Genome.query
+INDEXED_SETTINGS = ("group", "type")
+
+
+class TrackColumns(object):
+
+    __slots__ = ("parent", "track_class", "template", "columns", "children", "live_rows")
+
+    def __init__(self, columns, track_class, **kwargs):
+
+        self.parent = None
+        self.track_class = track_class
+        self.template = TrackedDict((sys.intern(k), v) for k, v in kwargs.items())
+        self.columns = {sys.intern(k): v if isinstance(v, (list, tuple)) else list(v) for k, v in columns.items()}
+        # rows have no children of their own
+        self.children = ()
+        # row -> Track handed out by live_row, so a row is always the same object
+        self.live_rows = {}
+
+        self._auto_complete_kwargs()
+        self._validate_kwargs()
+        self.template.owner = self
+
+    def __len__(self):
+
+        return len(self.columns["track"])
+
+    def _auto_complete_kwargs(self):
+
+        for k, v in self.track_class.default_kwargs.items():
+            if k not in self.columns and k not in self.template:
+                self.template[k] = v
+
+    def _validate_kwargs(self):
+
+        if "track" not in self.columns:
+            raise ValueError(f"{self.__class__.__name__}: track must be given as a column.")
+
+        lengths = {len(v) for v in self.columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"{self.__class__.__name__}: columns have different lengths {sorted(lengths)}.")
+
+        for k in self.columns:
+            if k in self.template:
+                raise ValueError(f"{self.__class__.__name__}: key {k} given both as a column and as a shared setting.")
+
+        for k in self.track_class.required_keys:
+            if k not in self.columns and k not in self.template:
+                raise ValueError(f"{self.__class__.__name__}: required key {k} not found in columns or kwargs.")
+
+    def _on_setting_change(self, key, old, new):
+
+        # shared settings are indexed per block, like the settings of a single track
+        if key not in INDEXED_SETTINGS:
+            return
+        genome = self.parent.get_genome() if self.parent is not None else None
+        if genome is not None:
+            genome._reindex(self, key, old, new)
+
+    def _row_kwargs(self, i):
+
+        # columns come first, then shared settings, as in Track(**columns, **kwargs)
+        kwargs = {k: v[i] for k, v in self.columns.items() if v[i] is not _DELETED}
+        kwargs.update(self.template)
+        return kwargs
+
+    def row(self, i):
+
+        # materialize the Track of one row, e.g. for sampling or lookup
+        track = self.track_class(**self._row_kwargs(i))
+        track.parent = self.parent
+        return track
+
+    def live_row(self, i):
+
+        # a Track that reads and writes row i of the columns, e.g. for Genome.find_track
+        track = self.live_rows.get(i)
+        if track is None:
+            track = object.__new__(self.track_class)
+            track.kwargs = RowKwargs(self, i)
+            track._stanza = None
+            track.parent = self.parent
+            track.children = []
+            track.trackDb = None
+            self.live_rows[i] = track
+        return track
+
+    def rows(self):
+
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def _compile(self, indent_level=0, exclude=()):
+
+        # line templates in stanza order: shared lines are rendered once, column lines per row
+        indent = indent_level * 4 * " "
+        required_keys = self.track_class.required_keys
+        keys = [k for k in required_keys] + [k for k in self.columns if k not in required_keys] + [k for k in self.template if k not in required_keys]
+
+        parts = []
+        for k in keys:
+            if k.startswith("_") or (k == "parent" and self.parent is None) or k in exclude:
+                continue
+            if k in self.columns:
+                parts.append((indent + f"{k} ", self.columns[k]))
+            else:
+                parts.append((indent + f"{k} {self.template[k]}\n", None))
+        return parts
+
+    def write(self, file_handle, indent_level=0, exclude=(), exclude_tracks=()):
+
+        # exclude drops settings, exclude_tracks drops whole rows by track name
+        parts = self._compile(indent_level=indent_level, exclude=exclude)
+        names = self.columns["track"]
+        for i in range(len(self)):
+            if exclude_tracks and names[i] in exclude_tracks:
+                continue
+            stanza = []
+            for prefix, column in parts:
+                if column is None:
+                    stanza.append(prefix)
+                elif column[i] is not _DELETED:
+                    stanza.append(f"{prefix}{column[i]}\n")
+            stanza.append("\n")
+            file_handle.write("".join(stanza))
+
+    def format(self, indent_level=0, exclude=(), exclude_tracks=()):
+
+        with io.StringIO() as f:
+            self.write(f, indent_level=indent_level, exclude=exclude, exclude_tracks=exclude_tracks)
+            return f.getvalue()
+
+
+class RowKwargs(MutableMapping):
+
+    __slots__ = ("block", "index")
+
+    def __init__(self, block, index):
+
+        # the settings of one row: its cells, then the settings shared by the block
+        self.block = block
+        self.index = index
+
+    def __getitem__(self, key):
+
+        column = self.block.columns.get(key)
+        if column is None:
+            return self.block.template[key]
+        value = column[self.index]
+        if value is _DELETED:
+            raise KeyError(key)
+        return value
+
+    def _column(self, key):
+
+        # a shared setting that differs on one row becomes a column
+        block = self.block
+        column = block.columns.get(key)
+        if column is None:
+            value = block.template[key] if key in block.template else _DELETED
+            column = [value] * len(block)
+            if key in block.template:
+                block.template._remove(key)
+        elif not isinstance(column, list):
+            column = list(column)
+        block.columns[key] = column
+        return column
+
+    def _set_cell(self, key, value):
+
+        block = self.block
+        if key == "track":
+            genome = block.parent.get_genome() if block.parent is not None else None
+            if genome is not None:
+                genome._reindex((block, self.index), key, self[key], value)
+            self._column(key)[self.index] = value
+            return
+        if key not in INDEXED_SETTINGS:
+            self._column(key)[self.index] = value
+            return
+
+        # the block is indexed as a unit, by the value every row shares
+        from .query import node_setting
+        old = node_setting(block, key)
+        self._column(key)[self.index] = value
+        new = node_setting(block, key)
+        if new != old:
+            block._on_setting_change(key, old, new)
+
+    def __setitem__(self, key, value):
+
+        if key in self.block.template and self.block.template[key] == value:
+            return
+        self._set_cell(key, value)
+
+    def __delitem__(self, key):
+
+        if key not in self:
+            raise KeyError(key)
+        if key == "track":
+            raise ValueError(f"{self.block.__class__.__name__}: track cannot be deleted from a row.")
+        self._set_cell(key, _DELETED)
+
+    def __contains__(self, key):
+
+        column = self.block.columns.get(key)
+        if column is None:
+            return key in self.block.template
+        return column[self.index] is not _DELETED
+
+    def __iter__(self):
+
+        for k, column in self.block.columns.items():
+            if column[self.index] is not _DELETED:
+                yield k
+        yield from self.block.template
+
+    def __len__(self):
+
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+
+        return f"{self.__class__.__name__}({dict(self)!r})"
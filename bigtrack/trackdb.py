@@ -1,30 +1,45 @@
 #!/usr/bin/env python3
 
+import io
 import os
 from .hub_component import HubComponent
+from .sink import DirectorySink
 from .track import Track
 
 
 class TrackDb(HubComponent):
 
+    __slots__ = ("tracks", "genome")
+
     required_keys = ["include"]
+    buffer_size = 64 * io.DEFAULT_BUFFER_SIZE
 
     def __init__(self, **kwargs):
 
         super().__init__(**kwargs)
         self.tracks = []
+        self.genome = None
     
     def add_track(self, track: Track):
 
         if not isinstance(track, Track):
             raise ValueError(f"Track must be an instance of Track, not {type(track)}.")
 
+        if self.genome is not None:
+            self.genome._index_tracks([track])
+
+        track.trackDb = self
         self.tracks.append(track)
     
-    def generate(self, target_path=""):
+    def generate(self, target_path="", sink=None):
+
+        sink = DirectorySink() if sink is None else sink
+        with sink.open(os.path.join(target_path, self.kwargs["include"]), buffering=self.buffer_size) as tracks_f:
+            self.write_tracks(tracks_f)
+
+    def write_tracks(self, file_handle):
 
-        with open(os.path.join(target_path, self.kwargs["include"]), "w") as tracks_f:
-            for track in self.tracks:
-                tracks_f.write(track.format(indent_level=0))
-                track.generate(tracks_f)
+        for track in self.tracks:
+            track.write(file_handle, indent_level=0)
+            track.generate(file_handle)
 
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import bigtrack
+from bigtrack.core import Core
+
+
+def write_config(tmp_path):
+
+    config = {
+        "hub": {"hub": "h", "shortLabel": "h", "longLabel": "h", "email": "a@b"},
+        "genomes": [{
+            "genome": "g1",
+            "trackDbs": [{"include": "trackDb_a.txt", "tracks": [
+                {"track": "t0", "shortLabel": "s", "longLabel": "l", "type": "bigWig"},
+            ]}],
+        }],
+    }
+    path = tmp_path / "hub.json"
+    path.write_text(json.dumps(config))
+    return str(path)
+
+
+def test_broken_cache_entry_is_rebuilt(tmp_path):
+
+    config_path = write_config(tmp_path)
+    cache_dir = str(tmp_path / "cache")
+    Core(config_path, cache_dir=cache_dir)
+    (entry,) = os.listdir(cache_dir)
+    entry = os.path.join(cache_dir, entry)
+    with open(entry, "rb") as f:
+        data = f.read()
+
+    for size in (9, 10, len(data) // 2):
+        with open(entry, "wb") as f:
+            f.write(data[:size])
+        core = Core(config_path, cache_dir=cache_dir)
+        assert core.hub.find_track("t0") is not None
+
+    # an entry that loads but has an unexpected layout
+    bigtrack.snapshot.save_snapshot((None, None), entry)
+    core = Core(config_path, cache_dir=cache_dir)
+    assert core.hub.find_track("t0") is not None
+
+
+def test_generate_returns_changed_files(tmp_path):
+
+    core = Core(write_config(tmp_path))
+    target_path = str(tmp_path / "out")
+    assert core.generate(target_path=target_path, incremental=True)
+    assert core.generate(target_path=target_path, incremental=True) == []
+
+
+def test_lazy_matrix_with_unknown_template_fails_at_load(tmp_path):
+
+    config = {
+        "hub": {"hub": "h", "shortLabel": "h", "longLabel": "h", "email": "a@b"},
+        "lists": {"samples": ["s1", "s2"]},
+        "genomes": [{
+            "genome": "g1",
+            "trackDbs": [{"include": "trackDb_a.txt", "tracks": [{
+                "class": "CompositeTrack", "track": "comp", "shortLabel": "c", "longLabel": "c", "type": "bigWig",
+                "children": [{"matrix": {"sample": "samples"}, "track": "{sample}", "template": "nope"}],
+            }]}],
+        }],
+    }
+    path = tmp_path / "hub.json"
+    path.write_text(json.dumps(config))
+    try:
+        Core(str(path), cache_dir=str(tmp_path / "cache"))
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("unknown template accepted")
+    assert not os.path.exists(tmp_path / "cache")
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import os
+import bigtrack
+
+
+def make_hub(genomes=3):
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    for g in range(genomes):
+        genome = bigtrack.Genome(genome=f"g{g}")
+        hub.add_genome(genome)
+        for d in range(2):
+            trackDb = bigtrack.TrackDb(include=f"trackDb_{d}.txt")
+            genome.add_trackDb(trackDb)
+            for i in range(20):
+                trackDb.add_track(bigtrack.Track(track=f"t{g}_{d}_{i}", shortLabel="s", longLabel="l", type="bigWig"))
+    return hub
+
+
+def read_tree(root):
+
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name != ".manifest.json":
+                path = os.path.join(directory, name)
+                with open(path) as f:
+                    files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def test_worker_pools_write_the_same_files(tmp_path):
+
+    hub = make_hub()
+    expected = bigtrack.MemorySink()
+    hub.generate(sink=expected)
+    expected = {os.path.relpath(path, "h"): text for path, text in expected.files.items()}
+
+    for i, options in enumerate(({"workers": 3}, {"trackDb_workers": 2}, {"workers": 2, "trackDb_workers": 2})):
+        target_path = tmp_path / f"out{i}"
+        hub.generate(target_path=str(target_path), **options)
+        assert read_tree(target_path / "h") == expected
+
+    # forked workers report the files they wrote to the manifest
+    target_path = str(tmp_path / "incremental")
+    changed = hub.generate(target_path=target_path, workers=3, trackDb_workers=2, incremental=True)
+    assert sorted(changed) == sorted(expected)
+    assert hub.generate(target_path=target_path, workers=3, incremental=True) == []
+
+
+def test_genome_generate_on_forked_workers(tmp_path):
+
+    hub = make_hub(genomes=1)
+    genome = hub.genomes[0]
+    expected = bigtrack.MemorySink()
+    genome.generate(sink=expected)
+
+    genome.generate(target_path=str(tmp_path), workers=2)
+    assert read_tree(tmp_path) == expected.files
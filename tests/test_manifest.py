@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+
+import os
+import bigtrack
+
+
+def make_hub():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    for g in range(2):
+        genome = bigtrack.Genome(genome=f"g{g}")
+        hub.add_genome(genome)
+        for d in range(2):
+            trackDb = bigtrack.TrackDb(include=f"trackDb_{d}.txt")
+            genome.add_trackDb(trackDb)
+            trackDb.add_track(bigtrack.Track(track=f"t{g}_{d}", shortLabel="s", longLabel="l", type="bigWig"))
+    return hub
+
+
+def test_unchanged_rerun_reports_nothing(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    assert "g0/trackDb_0.txt" in hub.generate(target_path=target_path, incremental=True)
+    mtime = os.path.getmtime(tmp_path / "h" / "g0" / "trackDb_0.txt")
+
+    assert hub.generate(target_path=target_path, incremental=True) == []
+    assert os.path.getmtime(tmp_path / "h" / "g0" / "trackDb_0.txt") == mtime
+
+
+def test_dropped_files_are_deleted_and_reported(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    hub.generate(target_path=target_path, incremental=True)
+
+    hub.genomes[0].trackDbs.pop()
+    hub.genomes.pop()
+    changed = hub.generate(target_path=target_path, incremental=True)
+    assert changed == ["g0/trackDb.txt", "g0/trackDb_1.txt", "g1/groups.txt", "g1/trackDb.txt", "g1/trackDb_0.txt", "g1/trackDb_1.txt", "genomes.txt"]
+
+    hub_dir = tmp_path / "h"
+    assert not (hub_dir / "g0" / "trackDb_1.txt").exists()
+    assert (hub_dir / "g0" / "trackDb_0.txt").exists()
+    # the directory of the dropped genome goes once it is empty
+    assert not (hub_dir / "g1").exists()
+    assert hub.generate(target_path=target_path, incremental=True) == []
+
+
+def test_files_outside_the_manifest_are_kept(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    hub.generate(target_path=target_path, incremental=True)
+    (tmp_path / "h" / "g1" / "notes.txt").write_text("mine")
+
+    hub.genomes.pop()
+    hub.generate(target_path=target_path, incremental=True)
+    assert (tmp_path / "h" / "g1" / "notes.txt").read_text() == "mine"
+    assert not (tmp_path / "h" / "g1" / "trackDb.txt").exists()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+import bigtrack
+
+
+def make_genome():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    return genome, trackDb
+
+
+def names(query):
+
+    return sorted(query.names())
+
+
+def test_set_on_template_tracks_moves_them_between_buckets():
+
+    genome, trackDb = make_genome()
+    template = bigtrack.Template(type="bigBed 9", group="varRep", shortLabel="s", longLabel="l")
+    for i in range(3):
+        trackDb.add_track(bigtrack.Track(track=f"t{i}", template=template))
+
+    genome.query(group="varRep").set(group="other")
+    assert names(genome.query(group="varRep")) == []
+    assert names(genome.query(group="other")) == ["t0", "t1", "t2"]
+
+    # deleting an inherited setting leaves the track without a group
+    del genome.find_track("t0").kwargs["group"]
+    assert names(genome.query(group="other")) == ["t1", "t2"]
+
+
+def test_views_follow_changes_to_their_original():
+
+    genome, trackDb = make_genome()
+    composite = bigtrack.CompositeTrack(track="comp", shortLabel="c", longLabel="c", type="bigWig")
+    trackDb.add_track(composite)
+    for i in range(4):
+        composite.add_child(bigtrack.Track(track=f"t{i}", shortLabel="s", longLabel="l", type="bigWig", group="reg"))
+    trackDb.add_track(bigtrack.SampledCompositeTrack(composite, 4))
+
+    assert names(genome.query(group="reg")) == ["t0", "t0_subset", "t1", "t1_subset", "t2", "t2_subset", "t3", "t3_subset"]
+    genome.find_track("t1").kwargs["group"] = "other"
+    assert names(genome.query(group="other")) == ["t1", "t1_subset"]
+    assert "t1_subset" not in names(genome.query(group="reg"))
+
+
+def test_setting_index_is_built_by_the_first_query():
+
+    genome, trackDb = make_genome()
+    composite = bigtrack.CompositeTrack(track="comp", shortLabel="c", longLabel="c", type="bigWig")
+    trackDb.add_track(composite)
+    composite.add_child(bigtrack.Track(track="t0", shortLabel="s", longLabel="l", type="bigWig", group="reg"))
+    assert genome.setting_index is None
+
+    # parent queries read the parent's children and leave the index unbuilt
+    assert names(genome.query(parent="comp")) == ["t0"]
+    assert names(genome.query(parent="missing")) == []
+    assert genome.setting_index is None
+
+    assert names(genome.query(group="reg")) == ["t0"]
+    composite.add_child(bigtrack.Track(track="t1", shortLabel="s", longLabel="l", type="bigWig", group="reg"))
+    assert names(genome.query(group="reg")) == ["t0", "t1"]
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+
+import bigtrack
+
+
+def test_track_names_from_sheet_values_are_cleaned(tmp_path):
+
+    path = tmp_path / "samples.tsv"
+    path.write_text("sample\ttissue\turl\nB\tliver cell\tb.bw\nC\tlung/left\tc.bw\n")
+    composite = bigtrack.CompositeTrack(track="iso", shortLabel="c", longLabel="c", type="bigWig")
+    block = composite.add_sample_sheet(str(path), track="iso_{sample}_{tissue}", bigDataUrl="{url}", shortLabel="s", longLabel="l", type="bigWig")
+    assert block.columns["track"] == ["iso_B_liver_cell", "iso_C_lung_left"]
+    assert block.columns["bigDataUrl"] == ["b.bw", "c.bw"]
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import bigtrack
+
+
+def make_hub():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    super_track = bigtrack.SuperTrack(track="sup", shortLabel="sup", longLabel="sup")
+    trackDb.add_track(super_track)
+    composite = bigtrack.CompositeTrack(track="comp", shortLabel="c", longLabel="c", type="bigWig")
+    super_track.add_child(composite)
+    for i in range(5):
+        composite.add_child(bigtrack.Track(track=f"t{i}", shortLabel="s", longLabel="l", type="bigWig"))
+    return genome, super_track, composite
+
+
+def test_subset_of_attached_composite_can_be_attached():
+
+    genome, super_track, composite = make_hub()
+    subset = bigtrack.SampledCompositeTrack(composite, 2)
+    # nothing is indexed until the subset is attached
+    assert not any(name.endswith("_subset") for name in genome.track_index)
+
+    super_track.add_child(subset)
+    assert genome.find_track("comp_subset") is subset
+    for child in subset.children:
+        assert genome.find_track(child.kwargs["track"]) is child
+
+
+def test_one_shot_provider_is_not_consumed_by_sampling():
+
+    genome, super_track, composite = make_hub()
+    composite.add_child_provider(bigtrack.Track(track=f"p{i}", shortLabel="s", longLabel="l", type="bigWig") for i in range(5))
+    try:
+        bigtrack.SampledCompositeTrack(composite, 3)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("sampling a one-shot provider should be rejected")
+
+    # the full composite still writes its provided children
+    sink = bigtrack.MemorySink()
+    genome.hub.generate(sink=sink)
+    assert "track p4" in sink.files["h/g1/trackDb_a.txt"]
+
+
+def test_callable_provider_can_be_sampled():
+
+    genome, super_track, composite = make_hub()
+    composite.add_child_provider(lambda: (bigtrack.Track(track=f"p{i}", shortLabel="s", longLabel="l", type="bigWig") for i in range(5)))
+    subset = bigtrack.SampledCompositeTrack(composite, 3)
+    super_track.add_child(subset)
+
+    sink = bigtrack.MemorySink()
+    genome.hub.generate(sink=sink)
+    assert "track p4" in sink.files["h/g1/trackDb_a.txt"]
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import bigtrack
+
+
+def test_snapshot_of_deep_track_chain(tmp_path):
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    track = bigtrack.SuperTrack(track="s0", shortLabel="s", longLabel="s")
+    trackDb.add_track(track)
+    for i in range(1, 5000):
+        child = bigtrack.SuperTrack(track=f"s{i}", shortLabel="s", longLabel="s")
+        track.add_child(child)
+        track = child
+
+    path = str(tmp_path / "hub.snapshot")
+    hub.save_snapshot(path)
+    loaded = bigtrack.Hub.load_snapshot(path)
+
+    expected = bigtrack.MemorySink()
+    hub.generate(sink=expected)
+    actual = bigtrack.MemorySink()
+    loaded.generate(sink=actual)
+    assert actual.files == expected.files
+    assert loaded.find_track("s4999").parent is loaded.find_track("s4998")
+
+
+def test_truncated_snapshot_raises_value_error(tmp_path):
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    path = str(tmp_path / "hub.snapshot")
+    hub.save_snapshot(path)
+    with open(path, "rb") as f:
+        data = f.read()
+
+    for size in (0, 8, 10, 12, len(data) - 1):
+        with open(path, "wb") as f:
+            f.write(data[:size])
+        try:
+            bigtrack.Hub.load_snapshot(path)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"snapshot cut after {size} bytes was loaded")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+import os
+import bigtrack
+
+
+def make_hub():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    trackDb.add_track(bigtrack.Track(track="t0", shortLabel="s", longLabel="l", type="bigWig"))
+    return hub
+
+
+def staged_dirs(tmp_path):
+
+    return sorted(name for name in os.listdir(tmp_path) if name.startswith(".h."))
+
+
+def test_staged_rerun_repoints_the_symlink(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    hub_dir = tmp_path / "h"
+    # unrelated siblings, including one that looks like a stage directory of another hub
+    (tmp_path / "other").mkdir()
+    (tmp_path / ".hx.keep").mkdir()
+
+    hub.generate(target_path=target_path, staged=True)
+    assert hub_dir.is_symlink()
+    first = os.readlink(hub_dir)
+    assert staged_dirs(tmp_path) == [first]
+
+    hub.genomes[0].trackDbs[0].tracks[0].kwargs["shortLabel"] = "changed"
+    hub.generate(target_path=target_path, staged=True, incremental=True)
+    second = os.readlink(hub_dir)
+    assert second != first
+    # only the previously staged directory is removed
+    assert staged_dirs(tmp_path) == [second]
+    assert (tmp_path / "other").is_dir() and (tmp_path / ".hx.keep").is_dir()
+    assert "shortLabel changed" in (hub_dir / "g1" / "trackDb_a.txt").read_text()
+
+
+def test_plain_hub_directory_is_converted_once(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    hub.generate(target_path=target_path)
+    assert not (tmp_path / "h").is_symlink()
+
+    hub.generate(target_path=target_path, staged=True)
+    assert (tmp_path / "h").is_symlink()
+    assert (tmp_path / "h" / "hub.txt").is_file()
+    assert sorted(os.listdir(tmp_path)) == sorted(["h", os.readlink(tmp_path / "h")])
+
+
+def test_symlink_to_a_user_directory_is_not_removed(tmp_path):
+
+    hub = make_hub()
+    target_path = str(tmp_path)
+    (tmp_path / "mine").mkdir()
+    os.symlink("mine", tmp_path / "h")
+
+    hub.generate(target_path=target_path, staged=True)
+    assert os.readlink(tmp_path / "h") != "mine"
+    assert (tmp_path / "mine").is_dir()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+
+from contextlib import contextmanager
+import bigtrack
+
+
+class RecordingFile(object):
+
+    def __init__(self, f, sink):
+
+        self.f = f
+        self.sink = sink
+
+    def write(self, text):
+
+        self.sink.largest_write = max(self.sink.largest_write, len(text))
+        return self.f.write(text)
+
+
+class RecordingSink(bigtrack.MemorySink):
+
+    def __init__(self):
+
+        super().__init__()
+        self.largest_write = 0
+
+    @contextmanager
+    def open(self, path, buffering=-1):
+
+        with super().open(path, buffering) as f:
+            yield RecordingFile(f, self)
+
+
+def test_columnar_block_is_written_row_by_row_to_every_target():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    composite = bigtrack.CompositeTrack(track="cnv", shortLabel="c", longLabel="c", type="bigBed")
+    trackDb.add_track(composite)
+    names = [f"s{i}" for i in range(1000)]
+    composite.add_child_columns({"track": names, "bigDataUrl": [f"{name}.bb" for name in names]}, shortLabel="s", longLabel="l", type="bigBed 9")
+
+    sink = RecordingSink()
+    hub.generate_targets([bigtrack.Target(), bigtrack.Target(hub="h2")], sink=sink)
+    assert sink.files["h/g1/trackDb_a.txt"] == sink.files["h2/g1/trackDb_a.txt"]
+    assert sink.files["h/g1/trackDb_a.txt"].count("\n    track s") == 1000
+    assert sink.largest_write < 200
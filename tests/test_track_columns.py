@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+import bigtrack
+
+
+def make_block():
+
+    hub = bigtrack.Hub(hub="h", shortLabel="h", longLabel="h", email="a@b")
+    genome = bigtrack.Genome(genome="g1")
+    hub.add_genome(genome)
+    trackDb = bigtrack.TrackDb(include="trackDb_a.txt")
+    genome.add_trackDb(trackDb)
+    composite = bigtrack.CompositeTrack(track="comp", shortLabel="c", longLabel="c", type="bigBed")
+    trackDb.add_track(composite)
+    block = composite.add_child_columns(
+        {"track": ["k0", "k1", "k2"], "bigDataUrl": ["a", "b", "c"]},
+        shortLabel="s", longLabel="l", type="bigBed 9", visibility="dense",
+    )
+    return genome, block
+
+
+def test_find_track_returns_a_row_that_writes_back():
+
+    genome, block = make_block()
+    row = genome.find_track("k1")
+    assert row is genome.find_track("k1")
+
+    row.kwargs["visibility"] = "hide"
+    row.kwargs["bigDataUrl"] = "B"
+    stanzas = block.format().split("\n\n")
+    assert "visibility hide" in stanzas[1] and "bigDataUrl B" in stanzas[1]
+    assert "visibility dense" in stanzas[0] and "visibility dense" in stanzas[2]
+
+    del row.kwargs["visibility"]
+    assert "visibility" not in block.format().split("\n\n")[1]
+
+
+def test_row_rename_updates_the_name_index():
+
+    genome, block = make_block()
+    row = genome.find_track("k1")
+    row.kwargs["track"] = "k1b"
+    assert genome.find_track("k1") is None
+    assert genome.find_track("k1b") is row
+
+    try:
+        row.kwargs["track"] = "k0"
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate name accepted")
+    assert block.columns["track"] == ["k0", "k1b", "k2"]